@@ -0,0 +1,85 @@
+# activity_cache.py
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+import discord
+
+# Distinct activities kept; the same game or track is shared by many members,
+# so this covers far more members than entries
+ACTIVITY_CACHE_SIZE = 20000
+
+
+def _stamp(value) -> Optional[float]:
+    return value.timestamp() if value else None
+
+
+def activity_fingerprint(activity: discord.BaseActivity) -> tuple:
+    """
+    Everything serialize_activity reads from an activity, as a hashable
+    tuple. Equal fingerprints serialize to equal dicts.
+    """
+    emoji = getattr(activity, "emoji", None)
+    party = getattr(activity, "party", None) or {}
+    return (
+        type(activity).__name__,
+        str(activity.type),
+        getattr(activity, "name", None),
+        getattr(activity, "details", None),
+        getattr(activity, "state", None),
+        _stamp(getattr(activity, "start", None)),
+        _stamp(getattr(activity, "end", None)),
+        getattr(activity, "track_id", None),
+        getattr(activity, "url", None),
+        getattr(activity, "platform", None),
+        str(emoji) if emoji else None,
+        getattr(emoji, "id", None),
+        getattr(activity, "large_image_url", None),
+        getattr(activity, "large_image_text", None),
+        getattr(activity, "small_image_url", None),
+        getattr(activity, "small_image_text", None),
+        party.get("id"),
+        tuple(party["size"]) if party.get("size") else None,
+    )
+
+
+class ActivityCache:
+    """
+    LRU cache of serialized activities keyed on ``activity_fingerprint``.
+
+    Members doing the same thing share one serialized dict, so a snapshot
+    rebuild only serializes activities it hasn't seen recently. The shared
+    dicts must be treated as read-only.
+    """
+
+    def __init__(self, max_size: int = ACTIVITY_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Optional[dict]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, activity: discord.BaseActivity, serialize: Callable[[discord.BaseActivity], Optional[dict]]) -> Optional[dict]:
+        key = activity_fingerprint(activity)
+        try:
+            data = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            data = self._entries[key] = serialize(activity)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return data
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return data
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
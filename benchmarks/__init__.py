@@ -0,0 +1,2 @@
+# Offline benchmarks for the snapshot API. Run from the repo root, e.g.
+#   python -m benchmarks.bench_compression
@@ -0,0 +1,110 @@
+# benchmarks/bench_binary.py
+"""
+Size, encode and parse time of the columnar snapshot (JSON and
+MessagePack) against the full JSON snapshot, after checking that every
+variant decodes back to the same snapshot. Parse time is the raw
+json.loads / msgpack.unpackb, which is all a consumer reading the
+columns directly pays.
+
+    python -m benchmarks.bench_binary --sizes 1000,10000,100000
+"""
+import argparse
+import json
+import os
+import time
+
+import columnar
+import json_backend
+from snapshot_store import SnapshotStore
+from benchmarks.synthetic import make_snapshot
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "members_snapshot.json")
+
+
+def best_of(repeat, fn):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def loaded(snapshot: dict) -> SnapshotStore:
+    store = SnapshotStore()
+    store.load(snapshot)
+    return store
+
+
+def edge_cases() -> dict:
+    """
+    A small snapshot with the awkward bits: nulls, a missing role, unknown
+    activity types, an activity shared by two members, an empty guild.
+    """
+    snapshot = make_snapshot(50, guilds=2, seed=1)
+    members = snapshot["guilds"][0]["members"]
+    members[0].update(global_name=None, nick=None, avatar_url=None, joined_at=None, badges=[], roles=[])
+    members[1]["activities"] = [{"type": "something-new", "name": "x"}]
+    members[2]["activities"] = members[3]["activities"] = [{"type": "playing", "name": "Same Game"}]
+    snapshot["guilds"].append({"id": "1", "name": "empty", "icon_url": None, "member_count": 0, "members": []})
+    return snapshot
+
+
+def check(store: SnapshotStore, name: str):
+    expected = json.loads(store.encoded())
+    variants = {"columnar json": json.loads(store.encoded(fmt="columnar"))}
+    if msgpack is not None:
+        variants["msgpack"] = msgpack.unpackb(store.msgpack())
+    for variant, data in variants.items():
+        if columnar.from_columnar(data) != expected:
+            raise AssertionError(f"{name}: {variant} does not round-trip")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated member counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cases = {"edge cases": edge_cases(), "synthetic 2000x3": make_snapshot(2000, guilds=3)}
+    if os.path.exists(SAMPLE):
+        with open(SAMPLE) as f:
+            cases["members_snapshot.json"] = json.load(f)
+    for name, snapshot in cases.items():
+        check(loaded(snapshot), name)
+    print(f"round-trip ok: {', '.join(cases)}")
+    if msgpack is None:
+        print("msgpack not installed, MessagePack rows skipped")
+
+    print(f"{'members':>8}  {'format':<14} {'bytes':>12} {'encode ms':>10} {'parse ms':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        store = loaded(make_snapshot(size))
+        variants = {
+            "full json": (
+                lambda: json_backend.dumps(store.snapshot()),
+                json.loads,
+            ),
+            "columnar json": (
+                lambda: json_backend.dumps(store.columnar_snapshot()),
+                json.loads,
+            ),
+        }
+        if msgpack is not None:
+            variants["msgpack"] = (
+                lambda: msgpack.packb(store.columnar_snapshot(string_ids=False)),
+                msgpack.unpackb,
+            )
+        for name, (encode, parse) in variants.items():
+            encode_time, body = best_of(args.repeat, encode)
+            parse_time, _ = best_of(args.repeat, lambda: parse(body))
+            print(f"{size:>8}  {name:<14} {len(body):>12,} {encode_time * 1000:>10.1f} {parse_time * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# benchmarks/bench_compression.py
+"""
+Payload size and encode time of the /api/snapshot body per Content-Encoding.
+
+    python -m benchmarks.bench_compression --sizes 1000,10000,100000
+"""
+import argparse
+import time
+
+import json_backend
+from snapshot_store import COMPRESSORS
+from benchmarks.synthetic import make_snapshot
+
+
+def best_of(repeat, fn):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated member counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'members':>8}  {'codec':<8} {'bytes':>12} {'ratio':>7} {'encode ms':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        snapshot = make_snapshot(size)
+        seconds, raw = best_of(args.repeat, lambda: json_backend.dumps(snapshot))
+        print(f"{size:>8}  {'identity':<8} {len(raw):>12,} {1.0:>7.2f} {seconds * 1000:>10.1f}")
+        for name, compress in COMPRESSORS.items():
+            # compression time only; the JSON bytes are shared by all variants
+            seconds, body = best_of(args.repeat, lambda: compress(raw))
+            print(f"{size:>8}  {name:<8} {len(body):>12,} {len(raw) / len(body):>7.2f} {seconds * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+# benchmarks/bench_http.py
+"""
+Load test of the REST API: starts bot.py's aiohttp app (start_web_app) in
+a separate process on a synthetic snapshot, then drives it with N
+concurrent clients doing a mix of dashboard- and scraper-style requests:
+conditional (If-None-Match) and compressed snapshot polls, deltas, member
+pages, /metrics... Meanwhile --streams clients hold /api/stream (SSE)
+connections open. Reports requests per second, latency percentiles per
+request kind, how long pushed deltas take to arrive and the server's event
+loop lag as JSON.
+
+    python -m benchmarks.bench_http --members 50000 --clients 50 --streams 20 --duration 20 -o after.json
+
+Each client sends its next request as soon as the previous one returns.
+If "client_cpu" nears 1.0 the load generator itself is the bottleneck;
+run fewer clients or several copies of this script against --port.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from benchmarks.bot_env import isolate
+from benchmarks.report import distribution, run_info, write_json
+from benchmarks.synthetic import make_snapshot
+
+# request kind -> weight in the default mix: mostly dashboard tabs polling
+# with If-None-Match and following deltas, plus some scrapers
+DEFAULT_MIX = (
+    "snapshot_conditional=6,normalized_conditional=2,delta=6,members=4,"
+    "guilds=1,snapshot_gzip=1,snapshot_identity=1,metrics=1"
+)
+# what a browser sends
+BROWSER_ENCODINGS = "gzip, deflate, br"
+
+
+# ---------- server process ----------
+
+async def churn(store, updates_per_second: float, changed_at: Dict[int, float]):
+    """
+    Patch random members' status, like presence updates would, so cached
+    snapshot variants keep getting invalidated. ``changed_at`` gets the
+    wall time of each version, for timing SSE deltas on the client side.
+    """
+    from member_record import STATUS_CODES
+
+    rng = random.Random(1)
+    codes = list(STATUS_CODES.values())
+    members = [(guild_id, member_id) for guild_id, guild in store.members.items() for member_id in guild]
+    # a batch every 100 ms at most, rather than a wakeup per update
+    batch = max(1, round(updates_per_second / 10))
+    while True:
+        await asyncio.sleep(batch / updates_per_second)
+        for guild_id, member_id in rng.sample(members, batch):
+            record = store.members.get(guild_id, {}).get(member_id)
+            if record is not None and store.upsert_member(guild_id, record.replace(status=rng.choice(codes))):
+                changed_at[store.version] = time.time()
+
+
+async def _serve(port: int, members: int, guilds: int, updates_per_second: float, conn):
+    import bot
+    from loop_monitor import LoopLagProbe
+
+    bot.snapshot_store.load(make_snapshot(members, guilds))
+    runner = await bot.start_web_app("127.0.0.1", port)
+    conn.send("ready")
+
+    await asyncio.to_thread(conn.recv)  # measurement starts
+    probe = LoopLagProbe().start()
+    changed_at = {}
+    updates = (
+        asyncio.create_task(churn(bot.snapshot_store, updates_per_second, changed_at))
+        if updates_per_second else None
+    )
+    await asyncio.to_thread(conn.recv)  # measurement ends
+    if updates is not None:
+        updates.cancel()
+    conn.send({
+        "loop_lag": await probe.stop(),
+        "snapshot_version": bot.snapshot_store.version,
+        "changed_at": changed_at,
+    })
+    await runner.cleanup()
+
+
+def serve(port: int, members: int, guilds: int, updates_per_second: float, conn):
+    isolate("bench_http_snapshot.json")
+    sys.stdout = sys.stderr
+    asyncio.run(_serve(port, members, guilds, updates_per_second, conn))
+
+
+# ---------- clients ----------
+
+class ClientState:
+    """
+    What one dashboard tab remembers between requests.
+    """
+
+    def __init__(self, guild_ids: List[str], rng: random.Random):
+        self.guild_ids = guild_ids
+        self.rng = rng
+        self.etags: Dict[str, str] = {}
+        self.epoch: Optional[str] = None
+        self.version = 0
+
+
+def build_request(kind: str, state: ClientState):
+    """
+    (path, headers) for one request of ``kind``.
+    """
+    if kind == "snapshot_conditional":
+        headers = {"Accept-Encoding": BROWSER_ENCODINGS}
+        if "snapshot" in state.etags:
+            headers["If-None-Match"] = state.etags["snapshot"]
+        return "/api/snapshot", headers
+    if kind == "normalized_conditional":
+        headers = {"Accept-Encoding": BROWSER_ENCODINGS}
+        if "normalized" in state.etags:
+            headers["If-None-Match"] = state.etags["normalized"]
+        return "/api/snapshot?format=normalized", headers
+    if kind == "snapshot_gzip":
+        return "/api/snapshot", {"Accept-Encoding": "gzip"}
+    if kind == "snapshot_identity":
+        return "/api/snapshot", {"Accept-Encoding": "identity"}
+    if kind == "delta":
+        path = f"/api/snapshot/delta?since={state.version}"
+        if state.epoch:
+            path += f"&epoch={state.epoch}"
+        return path, {"Accept-Encoding": BROWSER_ENCODINGS}
+    if kind == "members":
+        guild_id = state.rng.choice(state.guild_ids)
+        query = f"&q=user{state.rng.randrange(100)}" if state.rng.random() < 0.5 else ""
+        return f"/api/guilds/{guild_id}/members?limit=50{query}", {"Accept-Encoding": BROWSER_ENCODINGS}
+    if kind == "guilds":
+        return "/api/guilds", {}
+    if kind == "metrics":
+        return "/metrics", {}
+    raise ValueError(f"unknown request kind {kind!r}")
+
+
+def remember(kind: str, state: ClientState, response: aiohttp.ClientResponse, body: bytes):
+    etag = response.headers.get("ETag")
+    if response.status == 200 and etag and kind.endswith("_conditional"):
+        state.etags["snapshot" if kind.startswith("snapshot") else "normalized"] = etag
+        # "<epoch>-<version>[-format][-encoding]"
+        epoch, version = etag.strip('"').split("-")[:2]
+        state.epoch, state.version = epoch, max(state.version, int(version))
+    elif kind == "delta" and response.status == 200:
+        data = json.loads(body)
+        state.epoch, state.version = data.get("epoch", state.epoch), data.get("version", state.version)
+
+
+class Results:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Counter] = {}
+        self.bytes: Counter = Counter()
+        self.errors: Counter = Counter()
+
+    def add(self, kind: str, elapsed: float, status: int, size: int):
+        self.latencies.setdefault(kind, []).append(elapsed)
+        self.statuses.setdefault(kind, Counter())[str(status)] += 1
+        self.bytes[kind] += size
+
+    def report(self, duration: float) -> dict:
+        kinds = {}
+        for kind, latencies in sorted(self.latencies.items()):
+            kinds[kind] = {
+                "requests": len(latencies),
+                "per_second": round(len(latencies) / duration, 1),
+                "statuses": dict(self.statuses[kind]),
+                "bytes_per_request": round(self.bytes[kind] / len(latencies)),
+                "latency_ms": distribution(latencies, 1000),
+            }
+        every = [latency for latencies in self.latencies.values() for latency in latencies]
+        return {
+            "requests": len(every),
+            "per_second": round(len(every) / duration, 1),
+            "errors": dict(self.errors),
+            "mib_per_second": round(sum(self.bytes.values()) / duration / 2**20, 2),
+            "latency_ms": distribution(every, 1000),
+            "kinds": kinds,
+        }
+
+
+async def client(session: aiohttp.ClientSession, base: str, state: ClientState, kinds: List[str],
+                 weights: List[float], recording: asyncio.Event, deadline: float, results: Results):
+    rng = state.rng
+    while time.perf_counter() < deadline:
+        kind = rng.choices(kinds, weights)[0]
+        path, headers = build_request(kind, state)
+        start = time.perf_counter()
+        try:
+            async with session.get(base + path, headers=headers) as response:
+                body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if recording.is_set():
+                results.errors[type(e).__name__] += 1
+            continue
+        elapsed = time.perf_counter() - start
+        remember(kind, state, response, body)
+        if recording.is_set() and time.perf_counter() < deadline:
+            results.add(kind, elapsed, response.status, len(body))
+
+
+class StreamResults:
+    """
+    What the SSE clients saw: time to the first event per connection, and
+    per delta received while recording, the version it started from and
+    its arrival (wall clock, to compare with the server's change times).
+    """
+
+    def __init__(self):
+        self.connected: List[float] = []
+        self.events: Counter = Counter()
+        self.deltas: List[tuple] = []
+        self.bytes = 0
+        self.errors: Counter = Counter()
+
+    def report(self, duration: float, changed_at: Dict[int, float]) -> dict:
+        # a delta covers the versions after the one it starts from; it is as
+        # late as the oldest change in it
+        delays = [
+            arrived - changed_at[since + 1]
+            for since, arrived in self.deltas
+            if since + 1 in changed_at
+        ]
+        return {
+            "connections": len(self.connected),
+            "errors": dict(self.errors),
+            "first_event_ms": distribution(self.connected, 1000),
+            "events": dict(self.events),
+            "mib_per_second": round(self.bytes / duration / 2**20, 2),
+            "delta_delay_ms": distribution(delays, 1000),
+        }
+
+
+async def stream_client(session: aiohttp.ClientSession, recording: asyncio.Event, results: StreamResults):
+    """
+    Hold one /api/stream connection open until cancelled, like a dashboard
+    tab with live updates on.
+    """
+    start = time.perf_counter()
+    version = None
+    # the idle stream is only broken by heartbeats: no overall timeout
+    timeout = aiohttp.ClientTimeout(total=None)
+    try:
+        async with session.get("/api/stream", headers={"Accept-Encoding": "identity"}, timeout=timeout) as response:
+            buffer = bytearray()
+            async for chunk in response.content.iter_any():
+                # events end with a blank line; only look for one in the new bytes
+                searched = max(0, len(buffer) - 1)
+                buffer += chunk
+                while True:
+                    end = buffer.find(b"\n\n", searched)
+                    if end < 0:
+                        break
+                    event = bytes(buffer[:min(end, 200)])
+                    size = end + 2
+                    del buffer[:size]
+                    searched = 0
+                    if event.startswith(b":"):
+                        continue  # heartbeat
+
+                    # "id: <epoch>:<version>\nevent: <name>\ndata: ..."
+                    id_line, name_line = event.split(b"\n", 2)[:2]
+                    name = name_line.partition(b": ")[2].decode()
+                    new_version = int(id_line.rpartition(b":")[2])
+                    if version is None:
+                        results.connected.append(time.perf_counter() - start)
+                    elif recording.is_set():
+                        results.events[name] += 1
+                        results.bytes += size
+                        if name == "delta":
+                            results.deltas.append((version, time.time()))
+                    version = new_version
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        if recording.is_set():
+            results.errors[type(e).__name__] += 1
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        kind, _, weight = part.partition("=")
+        weights[kind.strip()] = float(weight or 1)
+    for kind in weights:
+        build_request(kind, ClientState(["0"], random.Random()))  # validates the name
+    return weights
+
+
+async def run(args, conn) -> dict:
+    mix = parse_mix(args.mix)
+    base = f"http://127.0.0.1:{args.port}"
+    # compressed bodies are measured as sent; don't spend client CPU inflating them
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(base, connector=connector, timeout=timeout, auto_decompress=False) as session:
+        async with session.get("/api/guilds") as response:
+            guild_ids = [guild["id"] for guild in (await response.json())["guilds"]]
+
+        recording = asyncio.Event()
+        results = Results()
+        stream_results = StreamResults()
+        streams = [
+            asyncio.create_task(stream_client(session, recording, stream_results))
+            for _ in range(args.streams)
+        ]
+        deadline = time.perf_counter() + args.warmup + args.duration
+        clients = [
+            asyncio.create_task(client(
+                session, "", ClientState(guild_ids, random.Random(i)), list(mix), list(mix.values()),
+                recording, deadline, results,
+            ))
+            for i in range(args.clients)
+        ]
+
+        await asyncio.sleep(args.warmup)
+        conn.send("start")
+        recording.set()
+        cpu_start = time.process_time()
+        started = time.perf_counter()
+        await asyncio.gather(*clients)
+        duration = time.perf_counter() - started
+        cpu = time.process_time() - cpu_start
+        conn.send("stop")
+        for task in streams:
+            task.cancel()
+        await asyncio.gather(*streams, return_exceptions=True)
+        server = await asyncio.to_thread(conn.recv)
+
+    return {
+        **run_info("http"),
+        "config": {
+            "members": args.members,
+            "guilds": args.guilds,
+            "clients": args.clients,
+            "streams": args.streams,
+            "duration_s": args.duration,
+            "updates_per_second": args.updates_per_second,
+            "mix": mix,
+        },
+        "client_cpu": round(cpu / duration, 2),
+        "server_loop_lag": server["loop_lag"],
+        "snapshot_versions": server["snapshot_version"],
+        **results.report(duration),
+        "streams": stream_results.report(duration, server["changed_at"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=10000, help="members in the synthetic snapshot")
+    parser.add_argument("--guilds", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=20, help="concurrent clients")
+    parser.add_argument("--streams", type=int, default=10, help="SSE connections held open (0 for none)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds measured")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of load before measuring")
+    parser.add_argument("--updates-per-second", type=float, default=20.0,
+                        help="member updates applied on the server while measuring (0 for a static snapshot)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="kind=weight,... (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("-o", "--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args()
+
+    # the server gets its own process (and event loop) so the clients don't
+    # compete with it for the GIL
+    parent, child = multiprocessing.Pipe()
+    server = multiprocessing.get_context("spawn").Process(
+        target=serve, args=(args.port, args.members, args.guilds, args.updates_per_second, child), daemon=True,
+    )
+    server.start()
+    try:
+        if not parent.poll(120) or parent.recv() != "ready":
+            raise SystemExit("server failed to start")
+        results = asyncio.run(run(args, parent))
+    finally:
+        server.join(timeout=10)
+        if server.is_alive():
+            server.terminate()
+
+    write_json(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
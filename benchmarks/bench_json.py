@@ -0,0 +1,42 @@
+# benchmarks/bench_json.py
+"""
+Encode time and peak memory of the snapshot per JSON backend.
+
+    python -m benchmarks.bench_json --sizes 1000,10000,100000
+"""
+import argparse
+import time
+import tracemalloc
+
+from json_backend import BACKEND, BACKENDS
+from benchmarks.synthetic import make_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated member counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"active backend: {BACKEND} (installed: {', '.join(BACKENDS)})")
+    print(f"{'members':>8}  {'backend':<8} {'bytes':>12} {'encode ms':>10} {'peak MiB':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        snapshot = make_snapshot(size)
+        for name, dumps in BACKENDS.items():
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                body = dumps(snapshot)
+                best = min(best, time.perf_counter() - start)
+
+            # separate run: tracemalloc slows allocation down
+            tracemalloc.start()
+            dumps(snapshot)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f"{size:>8}  {name:<8} {len(body):>12,} {best * 1000:>10.1f} {peak / 2**20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
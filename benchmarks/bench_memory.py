@@ -0,0 +1,59 @@
+# benchmarks/bench_memory.py
+"""
+Memory held by the snapshot's members as plain dicts (what build_snapshot
+used to keep) versus MemberRecords plus per-guild role tables.
+
+    python -m benchmarks.bench_memory --sizes 10000,100000
+"""
+import argparse
+import gc
+import tracemalloc
+
+from benchmarks.synthetic import make_snapshot
+from member_record import MemberRecord
+
+
+def dict_members(size: int) -> list:
+    snapshot = make_snapshot(size)
+    return [member for guild in snapshot["guilds"] for member in guild["members"]]
+
+
+def record_members(size: int) -> tuple:
+    members = dict_members(size)
+    roles = {}
+    for member in members:
+        for role in member["roles"]:
+            roles.setdefault(int(role["id"]), role)
+    records = [MemberRecord.from_dict(member) for member in members]
+    del members
+    return records, roles
+
+
+def measure(build, size: int) -> int:
+    """
+    Bytes still allocated by ``build(size)``'s result once it returns.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build(size)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000", help="comma-separated member counts")
+    args = parser.parse_args()
+
+    print(f"{'members':>8}  {'dicts MiB':>10} {'records MiB':>12} {'ratio':>6}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        dicts = measure(dict_members, size)
+        records = measure(record_members, size)
+        print(f"{size:>8}  {dicts / 2**20:>10.1f} {records / 2**20:>12.1f} {dicts / records:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# benchmarks/bench_snapshot.py
+"""
+Offline benchmark of the snapshot path: bot.build_snapshot() over fake
+guilds (see fake_discord.py) and bot.serialize_activity() per activity
+type. No Discord connection or token is needed. Results are printed as one
+JSON document, so runs can be saved and compared across commits.
+
+    python -m benchmarks.bench_snapshot --sizes 1000,10000,100000,1000000 -o after.json
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from benchmarks.bot_env import isolate
+
+isolate("bench_snapshot.json")
+
+import bot
+import json_backend
+from activity_cache import ActivityCache
+from benchmarks.fake_discord import ACTIVITY_KINDS, make_activity, make_guilds
+from benchmarks.report import distribution, run_info, write_json
+
+# serialize_member calls timed one by one per size, for the latency percentiles
+MEMBER_SAMPLES = 10000
+
+
+def bench_activities(iterations: int, seed: int) -> dict:
+    """
+    serialize_activity() per activity type, called directly and through a
+    cold ActivityCache (the path serialize_member takes).
+    """
+    rng = random.Random(seed)
+    results = {}
+    for kind in ACTIVITY_KINDS:
+        activities = [make_activity(rng, kind) for _ in range(iterations)]
+
+        latencies = []
+        started = time.perf_counter()
+        for activity in activities:
+            start = time.perf_counter()
+            bot.serialize_activity(activity)
+            latencies.append(time.perf_counter() - start)
+        elapsed = time.perf_counter() - started
+
+        cache = ActivityCache()
+        cached_started = time.perf_counter()
+        for activity in activities:
+            cache.get(activity, bot.serialize_activity)
+        cached_elapsed = time.perf_counter() - cached_started
+
+        results[kind] = {
+            "calls": iterations,
+            "per_second": round(iterations / elapsed),
+            "latency_us": distribution(latencies, 1e6),
+            "cached_per_second": round(iterations / cached_elapsed),
+            "cache_hit_rate": cache.stats()["hit_rate"],
+        }
+    return results
+
+
+async def bench_build(size: int, guilds: int, repeat: int, memory: bool, seed: int) -> dict:
+    fakes = make_guilds(size, guilds, seed)
+    bot.bot._connection._guilds = {guild.id: guild for guild in fakes}
+    members = [member for guild in fakes for member in guild.members]
+
+    durations = []
+    stats = {}
+    for _ in range(repeat):
+        # every run starts with cold caches, like a fresh process
+        bot.activity_cache = ActivityCache()
+        for guild_id in list(bot.snapshot_store.guilds):
+            bot.snapshot_store.remove_guild(guild_id)
+        gc.collect()
+        start = time.perf_counter()
+        stats = await bot.build_snapshot()
+        durations.append(time.perf_counter() - start)
+
+    step = max(1, len(members) // MEMBER_SAMPLES)
+    latencies = []
+    for member in members[::step]:
+        start = time.perf_counter()
+        bot.serialize_member(member)
+        latencies.append(time.perf_counter() - start)
+
+    encode_start = time.perf_counter()
+    body = bot.snapshot_store.encoded()
+    encode_s = time.perf_counter() - encode_start
+
+    result = {
+        "members": size,
+        "guilds": guilds,
+        "runs_ms": [round(duration * 1000, 1) for duration in durations],
+        "build_ms": distribution(durations, 1000, 1),
+        "members_per_second": round(size / min(durations)),
+        "serialize_member_us": distribution(latencies, 1e6),
+        "loop_lag": stats.get("loop_lag"),
+        "activity_cache": bot.activity_cache.stats(),
+        "encode_ms": round(encode_s * 1000, 1),
+        "snapshot_bytes": len(body),
+    }
+    del body
+
+    if memory:
+        # separate run: tracemalloc slows allocation down
+        bot.activity_cache = ActivityCache()
+        for guild_id in list(bot.snapshot_store.guilds):
+            bot.snapshot_store.remove_guild(guild_id)
+        gc.collect()
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        await bot.build_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["peak_mib"] = round((peak - baseline) / 2**20, 1)
+        result["retained_mib"] = round((current - baseline) / 2**20, 1)
+
+    bot.bot._connection._guilds = {}
+    return result
+
+
+async def run(args) -> dict:
+    bot.chunk_scheduler.start()
+    builds = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(f"build_snapshot: {size} members...", file=sys.stderr)
+        builds.append(await bench_build(size, args.guilds, args.repeat, not args.no_memory, args.seed))
+    print("serialize_activity...", file=sys.stderr)
+    return {
+        **run_info("snapshot"),
+        "json_backend": json_backend.BACKEND,
+        "max_slice_ms": bot.SNAPSHOT_MAX_SLICE * 1000,
+        "build_snapshot": builds,
+        "serialize_activity": bench_activities(args.activity_calls, args.seed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated member counts")
+    parser.add_argument("--guilds", type=int, default=4, help="guilds the members are spread over")
+    parser.add_argument("--repeat", type=int, default=3, help="build_snapshot runs per size")
+    parser.add_argument("--activity-calls", type=int, default=20000, help="serialize_activity calls per type")
+    parser.add_argument("--no-memory", action="store_true", help="skip the (slow) tracemalloc run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args()
+
+    # bot.py and the chunk scheduler print progress; keep stdout for the JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        results = asyncio.run(run(args))
+
+    write_json(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
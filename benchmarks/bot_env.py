@@ -0,0 +1,17 @@
+# benchmarks/bot_env.py
+"""
+Environment for benchmarks that import bot.py.
+"""
+import os
+import tempfile
+
+
+def isolate(snapshot_file: str):
+    """
+    Keep bot.py away from the real profile cache and saved snapshot: the
+    cache lives in memory and the snapshot is saved as ``snapshot_file``
+    in the temp directory. bot.py reads these at import time, so call this
+    before importing it.
+    """
+    os.environ["PROFILE_CACHE_PATH"] = ":memory:"
+    os.environ["SNAPSHOT_PATH"] = os.path.join(tempfile.gettempdir(), snapshot_file)
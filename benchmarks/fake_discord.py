@@ -0,0 +1,162 @@
+# benchmarks/fake_discord.py
+"""
+Stand-ins for the discord.py guild / member / role / user objects that
+bot.py serializes, so the snapshot path can be benchmarked without a
+gateway connection. Activities are real discord.py activity objects
+(Spotify, Streaming, Custom, Game and rich presence), since
+serialize_activity dispatches on their types.
+"""
+import datetime
+import random
+import zlib
+from typing import Dict, List, Optional
+
+import discord
+
+from benchmarks.synthetic import BADGES, BASE_ID, CDN, GAMES, TRACKS
+
+STATUSES = [discord.Status.online, discord.Status.idle, discord.Status.dnd] + [discord.Status.offline] * 3
+FLAGS = [discord.UserFlags[badge].value for badge in BADGES]
+ACTIVITY_KINDS = ("spotify", "streaming", "custom", "game", "rich_presence")
+STARTED = datetime.datetime(2025, 11, 22, 8, tzinfo=datetime.timezone.utc)
+
+
+class FakeAsset:
+    __slots__ = ("url",)
+
+    def __init__(self, url: str):
+        self.url = url
+
+
+class FakeRole:
+    __slots__ = ("id", "name", "color", "position")
+
+    def __init__(self, role_id: int, name: str, color: int, position: int):
+        self.id = role_id
+        self.name = name
+        self.color = discord.Colour(color)
+        self.position = position
+
+    def is_default(self) -> bool:
+        return self.position == 0
+
+
+class FakeUser:
+    __slots__ = ("id", "name", "discriminator", "global_name", "public_flags")
+
+    def __init__(self, user_id: int, name: str, flags: int):
+        self.id = user_id
+        self.name = name
+        self.discriminator = "0"
+        self.global_name = name.title()
+        self.public_flags = discord.PublicUserFlags._from_value(flags)
+
+
+class FakeMember:
+    __slots__ = ("id", "_user", "guild", "display_name", "nick", "display_avatar", "status", "activities", "roles", "joined_at")
+
+    def __init__(self, user: FakeUser, guild: "FakeGuild", nick: Optional[str], status: discord.Status,
+                 activities: tuple, roles: List[FakeRole], joined_at: datetime.datetime):
+        self.id = user.id
+        self._user = user
+        self.guild = guild
+        self.nick = nick
+        self.display_name = nick or user.global_name
+        self.display_avatar = FakeAsset(f"{CDN}/avatars/{user.id}/{user.id:032x}.png?size=1024")
+        self.status = status
+        self.activities = activities
+        self.roles = roles
+        self.joined_at = joined_at
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, name: str, roles: List[FakeRole]):
+        self.id = guild_id
+        self.name = name
+        self.icon = None
+        self.roles = roles
+        self.chunked = True
+        self._members: Dict[int, FakeMember] = {}
+
+    @property
+    def members(self) -> List[FakeMember]:
+        return list(self._members.values())
+
+    @property
+    def member_count(self) -> int:
+        return len(self._members)
+
+    def get_member(self, member_id: int) -> Optional[FakeMember]:
+        return self._members.get(member_id)
+
+    async def chunk(self):
+        return self.members
+
+
+def make_activity(rng: random.Random, kind: Optional[str] = None) -> discord.BaseActivity:
+    """
+    One activity of ``kind`` (spotify, streaming, custom, game or
+    rich_presence; random if None). Start times vary, so identical
+    activities only coincide as often as they would in a real guild.
+    """
+    kind = kind or rng.choice(ACTIVITY_KINDS)
+    start = int((STARTED + datetime.timedelta(seconds=rng.randrange(3600))).timestamp() * 1000)
+    if kind == "spotify":
+        title, artists, album = rng.choice(TRACKS)
+        track = zlib.crc32(title.encode())
+        return discord.Spotify(
+            details=title, state="; ".join(artists), timestamps={"start": start, "end": start + 200_000},
+            assets={"large_image": f"spotify:ab67616d0000b273{track:032x}", "large_text": album},
+            sync_id=f"{track:022x}", session_id="bench", party={"id": "spotify:bench"},
+        )
+    if kind == "streaming":
+        return discord.Streaming(
+            name=rng.choice(GAMES), url="https://twitch.tv/someone", details="come hang out", platform="Twitch",
+        )
+    if kind == "custom":
+        return discord.CustomActivity(rng.choice(["working on stuff", "brb", "do not disturb"]), emoji="🔥")
+    if kind == "game":
+        return discord.Game(rng.choice(GAMES), timestamps={"start": start})
+    game = rng.choice(GAMES)
+    return discord.Activity(
+        type=discord.ActivityType.playing, name=game, application_id=zlib.crc32(game.encode()),
+        details="In a match", state="Ranked", timestamps={"start": start},
+        assets={"large_image": str(zlib.crc32(game.encode()) + 1), "large_text": game},
+        party={"id": f"party-{rng.randrange(1000)}", "size": [rng.randint(1, 5), 5]},
+    )
+
+
+def make_guilds(members: int, guilds: int = 1, seed: int = 0, roles_per_guild: int = 25) -> List[FakeGuild]:
+    """
+    ``members`` fake members spread over ``guilds`` guilds, mixed like
+    benchmarks.synthetic: about half of the online members have an
+    activity. The same seed always produces the same guilds.
+    """
+    rng = random.Random(seed)
+    result = []
+    per_guild = members // guilds
+    for g in range(guilds):
+        everyone = FakeRole(BASE_ID + g, "@everyone", 0, 0)
+        roles = [everyone] + [
+            FakeRole(BASE_ID + g * 1000 + i, f"role-{i}", rng.choice([0, 0x5865F2, 0x57F287, 0xEB459E]), i + 1)
+            for i in range(roles_per_guild)
+        ]
+        guild = FakeGuild(BASE_ID + g, f"guild {g}", roles)
+        count = per_guild if g < guilds - 1 else members - per_guild * (guilds - 1)
+        for i in range(count):
+            member_id = BASE_ID + g * 10**9 + i
+            name = f"user{member_id % 10**7}"
+            flags = sum(rng.sample(FLAGS, rng.randrange(0, 3)))
+            status = rng.choice(STATUSES)
+            has_activity = status is not discord.Status.offline and rng.random() < 0.5
+            guild._members[member_id] = FakeMember(
+                FakeUser(member_id, name, flags),
+                guild,
+                nick=f"nick {name}" if rng.random() < 0.3 else None,
+                status=status,
+                activities=(make_activity(rng),) if has_activity else (),
+                roles=[everyone] + rng.sample(roles[1:], rng.randrange(0, 6)),
+                joined_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc) + datetime.timedelta(minutes=i),
+            )
+        result.append(guild)
+    return result
@@ -0,0 +1,64 @@
+# benchmarks/report.py
+"""
+Helpers for benchmarks that print machine-readable JSON results.
+"""
+import datetime
+import json
+import os
+import platform
+import subprocess
+from typing import List, Optional
+
+
+def distribution(samples: List[float], scale: float = 1.0, digits: int = 2) -> dict:
+    """
+    min / p50 / p90 / p99 / p99.9 / max / mean of ``samples``, times ``scale``.
+    """
+    values = sorted(samples)
+    if not values:
+        return {}
+
+    def pick(p: float) -> float:
+        return round(values[min(len(values) - 1, int(len(values) * p))] * scale, digits)
+
+    return {
+        "min": round(values[0] * scale, digits),
+        "p50": pick(0.5),
+        "p90": pick(0.9),
+        "p99": pick(0.99),
+        "p999": pick(0.999),
+        "max": round(values[-1] * scale, digits),
+        "mean": round(sum(values) / len(values) * scale, digits),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_info(benchmark: str) -> dict:
+    """
+    What a result was measured on, so runs can be compared across commits.
+    """
+    return {
+        "benchmark": benchmark,
+        "commit": git_commit(),
+        "at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def write_json(results: dict, path: Optional[str] = None):
+    data = json.dumps(results, indent=2)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(data + "\n")
+    else:
+        print(data)
@@ -0,0 +1,105 @@
+# benchmarks/synthetic.py
+"""
+Synthetic snapshot data in the /api/snapshot wire format, so the
+benchmarks can run without a Discord connection.
+"""
+import datetime
+import random
+import zlib
+from typing import List
+
+CDN = "https://cdn.discordapp.com"
+STATUSES = ["online", "idle", "dnd", "offline", "offline", "offline"]
+BADGES = ["hypesquad_bravery", "hypesquad_brilliance", "hypesquad_balance", "active_developer", "early_supporter"]
+GAMES = ["Minecraft", "Valorant", "League of Legends", "Counter-Strike 2", "Visual Studio Code", "Rocket League"]
+TRACKS = [("Blinding Lights", ["The Weeknd"], "After Hours"), ("Levitating", ["Dua Lipa"], "Future Nostalgia"),
+          ("As It Was", ["Harry Styles"], "Harry's House"), ("Bad Habit", ["Steve Lacy"], "Gemini Rights")]
+
+BASE_ID = 100_000_000_000_000_000
+
+
+def make_roles(rng: random.Random, guild_index: int, count: int = 25) -> List[dict]:
+    return [
+        {
+            "id": str(BASE_ID + guild_index * 1000 + i),
+            "name": f"role-{i}",
+            "color": rng.choice([None, 0x5865F2, 0x57F287, 0xFEE75C, 0xEB459E, 0xED4245]),
+            "position": i + 1,
+        }
+        for i in range(count)
+    ]
+
+
+def make_activity(rng: random.Random) -> dict:
+    kind = rng.randrange(4)
+    start = "2025-11-22T08:00:00+00:00"
+    if kind == 0:
+        title, artists, album = rng.choice(TRACKS)
+        track = zlib.crc32(title.encode())
+        return {
+            "type": "listening", "name": "Spotify", "timestamps": {"start": start, "end": "2025-11-22T08:03:20+00:00"},
+            "details": title, "state": "; ".join(artists), "title": title, "artists": artists, "album": album,
+            "album_cover_url": f"https://i.scdn.co/image/ab67616d0000b273{track:032x}",
+            "track_id": f"{track:022x}", "duration": 200.0,
+        }
+    if kind == 1:
+        return {
+            "type": "streaming", "name": rng.choice(GAMES), "details": "come hang out",
+            "platform": "Twitch", "url": "https://twitch.tv/someone",
+        }
+    if kind == 2:
+        return {"type": "custom", "name": "Custom Status", "state": "working on stuff", "emoji": {"name": "🔥"}}
+    game = rng.choice(GAMES)
+    return {
+        "type": "playing", "name": game, "timestamps": {"start": start}, "details": "In a match", "state": "Ranked",
+        "assets": {"large_image_url": f"{CDN}/app-assets/{zlib.crc32(game.encode())}/large.png", "large_image_text": game},
+    }
+
+
+def make_member(rng: random.Random, member_id: int, roles: List[dict]) -> dict:
+    name = f"user{member_id % 10**7}"
+    has_nick = rng.random() < 0.3
+    display = f"nick {name}" if has_nick else name.title()
+    status = rng.choice(STATUSES)
+    member_roles = sorted(rng.sample(roles, rng.randrange(0, 6)), key=lambda r: r["position"], reverse=True)
+    joined = datetime.datetime(2020, 1, 1) + datetime.timedelta(minutes=member_id % 2_000_000)
+    return {
+        "id": str(member_id),
+        "name": name,
+        "discriminator": "0",
+        "global_name": name.title(),
+        "display_name": display,
+        "nick": display if has_nick else None,
+        "avatar_url": f"{CDN}/avatars/{member_id}/{member_id:032x}.png?size=1024",
+        "banner_url": f"{CDN}/banners/{member_id}/{member_id:032x}.png?size=512" if rng.random() < 0.1 else None,
+        "banner_pending": False,
+        "accent_color": rng.choice([None, 0x2B2D31]),
+        "badges": rng.sample(BADGES, rng.randrange(0, 3)),
+        "status": status,
+        "activities": [make_activity(rng)] if status != "offline" and rng.random() < 0.5 else [],
+        "joined_at": joined.isoformat() + "+00:00",
+        "roles": member_roles,
+    }
+
+
+def make_snapshot(members: int, guilds: int = 1, seed: int = 0) -> dict:
+    """
+    Build a snapshot with ``members`` members spread over ``guilds`` guilds.
+    The same seed always produces the same snapshot.
+    """
+    rng = random.Random(seed)
+    result = {"epoch": "bench", "version": 1, "generated_at": "2025-11-22T08:50:07.331766Z", "guilds": []}
+    per_guild = members // guilds
+    for g in range(guilds):
+        roles = make_roles(rng, g)
+        count = per_guild if g < guilds - 1 else members - per_guild * (guilds - 1)
+        guild_members = [make_member(rng, BASE_ID + g * 10**9 + i, roles) for i in range(count)]
+        guild_members.sort(key=lambda m: (m["display_name"] or m["name"] or "").lower())
+        result["guilds"].append({
+            "id": str(BASE_ID + g),
+            "name": f"guild {g}",
+            "icon_url": None,
+            "member_count": count,
+            "members": guild_members,
+        })
+    return result
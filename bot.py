@@ -1,7 +1,9 @@
 # bot.py
 import os
-import datetime
-from typing import Dict, Optional
+import time
+
+# for the startup profile printed on the first on_ready
+STARTED_AT = time.perf_counter()
 
 from dotenv import load_dotenv
 
@@ -10,6 +12,23 @@ from discord.ext import commands
 
 from aiohttp import web
 import asyncio
+import gc
+import math
+
+import columnar
+import json_backend
+import metrics
+from activity_cache import ActivityCache
+from chunking import URGENT, ChunkScheduler
+from command_trace import CommandTracer
+from cog_loader import CogLoader, LazyCommandTree
+from command_sync import sync_commands
+from loop_monitor import LoopLagProbe, LoopWatchdog, TimeSlicer
+from member_index import SORTS, GuildIndex
+from profiles import OFFLINE, ONLINE, BannerResolver, Profile, ProfileCache
+from member_record import MemberRecord, status_code, to_micros
+from snapshot_file import SnapshotPersister
+from snapshot_store import COMPRESSORS, FORMATS, SnapshotStore, decode_cursor, encode_cursor
 
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
@@ -21,31 +40,129 @@ intents.members = True        # server members intent
 intents.presences = True      # presence intent
 intents.message_content = True  # optional, for commands
 
-bot = commands.Bot(command_prefix="!", intents=intents, help_command=None)
-
-_web_started = False
-
-# Cache banners so we don't spam fetch_user every 7s
-user_banner_cache: Dict[int, Optional[str]] = {}
-
-
-async def get_banner_url(member: discord.Member) -> Optional[str]:
-    """
-    Try to get banner URL, with caching per user.
-    """
-    if member.id in user_banner_cache:
-        return user_banner_cache[member.id]
-
-    banner_url = None
-    try:
-        full_user = await bot.fetch_user(member.id)
-        if full_user.banner:
-            banner_url = str(full_user.banner.url)
-    except Exception:
-        banner_url = None
-
-    user_banner_cache[member.id] = banner_url
-    return banner_url
+# chunking is done by chunk_scheduler below, not by discord.py before on_ready
+bot = commands.Bot(
+    command_prefix="!", intents=intents, help_command=None,
+    chunk_guilds_at_startup=False, tree_cls=LazyCommandTree,
+)
+# wall-clock process start, for /uptime (lazy cogs are loaded much later)
+bot.started_at = time.time()
+
+# COGS_LAZY=1 defers cogs without event listeners until one of their
+# commands is first used (see cog_loader.py)
+COGS_LAZY = os.getenv("COGS_LAZY") == "1"
+cog_loader = CogLoader(bot, lazy=COGS_LAZY)
+bot.cog_loader = cog_loader
+if COGS_LAZY:
+    cog_loader.install()
+
+# per-command latency, split into Discord REST / other HTTP / local time
+command_tracer = CommandTracer(bot)
+command_tracer.install()
+bot.command_tracer = command_tracer
+
+# Records event loop lag all the time, and the stack of whatever blocks the
+# loop for longer than LOOP_STALL_MS (see /api/stats and the console)
+loop_watchdog = LoopWatchdog(float(os.getenv("LOOP_STALL_MS", "200")) / 1000)
+bot.loop_watchdog = loop_watchdog
+
+# seconds from process start to the first on_ready
+startup_ready_s = None
+
+# Live snapshot, patched by gateway events below
+snapshot_store = SnapshotStore()
+
+# Saved periodically, and loaded on startup so the API has data to serve
+# before the gateway cache is chunked (members_snapshot.json is a sample
+# for the tests and benchmarks, not this)
+SNAPSHOT_PATH = os.getenv(
+    "SNAPSHOT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "live_snapshot.json")
+)
+snapshot_persister = SnapshotPersister(snapshot_store, SNAPSHOT_PATH)
+
+# Banners and accent colors need a REST call per user, so they are fetched
+# in the background and cached on disk; snapshots never wait for them.
+PROFILE_CACHE_PATH = os.getenv(
+    "PROFILE_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles.sqlite3")
+)
+profile_cache = ProfileCache(PROFILE_CACHE_PATH)
+
+
+async def on_profile_resolved(user_id: int, profile: Profile):
+    snapshot_store.patch_user(
+        user_id,
+        banner_url=profile.banner_url,
+        accent_color=profile.accent_color,
+        banner_pending=False,
+    )
+
+
+banner_resolver = BannerResolver(bot.fetch_user, profile_cache, on_profile_resolved)
+
+# shared with cogs (see commands/utility.py)
+bot.profile_cache = profile_cache
+bot.banner_resolver = banner_resolver
+
+# Serialized activities, shared by every member doing the same thing
+activity_cache = ActivityCache()
+
+# Snapshot (re)builds yield to the event loop at least this often, so a big
+# guild never holds up gateway heartbeats, commands or API requests
+SNAPSHOT_MAX_SLICE = float(os.getenv("SNAPSHOT_MAX_SLICE_MS", "10")) / 1000
+# Shared by every guild (re)build: they all run on the one event loop, so a
+# single deadline bounds each stretch whichever guild happens to be running
+snapshot_slicer = TimeSlicer(SNAPSHOT_MAX_SLICE)
+
+# Timing of the last build_snapshot(), served at /api/stats
+last_snapshot_build: dict = {}
+
+# guild ID -> IDs of members that changed while that guild was being rebuilt
+_rebuilding: dict = {}
+
+# Member chunk requests in flight at once; each guild is loaded into the
+# snapshot as soon as its own members are in
+CHUNK_CONCURRENCY = int(os.getenv("CHUNK_CONCURRENCY", "4"))
+chunk_scheduler = ChunkScheduler(lambda guild: refresh_guild(guild), CHUNK_CONCURRENCY)
+
+
+def guild_state(guild_id: int) -> str:
+    # guilds served from the saved snapshot that haven't been scheduled yet
+    return chunk_scheduler.state(guild_id) or "cached"
+
+
+# ---------- METRICS (served at /metrics) ----------
+
+SNAPSHOT_BUILD_SECONDS = metrics.Histogram(
+    "snapshot_build_seconds", "Time to chunk every guild and rebuild the snapshot.",
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+API_REQUESTS = metrics.Counter("api_requests_total", "API requests by route and status.", ("route", "method", "status"))
+API_REQUEST_SECONDS = metrics.Histogram("api_request_seconds", "API request latency by route.", ("route",))
+API_RESPONSE_BYTES = metrics.Histogram(
+    "api_response_bytes", "API response body size (as sent) by route.", ("route",), buckets=metrics.SIZE_BUCKETS
+)
+
+metrics.Gauge("discord_gateway_latency_seconds", "Heartbeat latency of the gateway connection.", collect=lambda: bot.latency)
+metrics.Gauge("discord_guilds", "Guilds the bot is in.", collect=lambda: len(bot.guilds))
+metrics.Gauge("snapshot_guilds", "Guilds in the live snapshot.", collect=lambda: len(snapshot_store.guilds))
+metrics.Gauge(
+    "snapshot_members", "Members in the live snapshot.",
+    collect=lambda: sum(len(members) for members in snapshot_store.members.values()),
+)
+metrics.Gauge("snapshot_version", "Version of the live snapshot.", collect=lambda: snapshot_store.version)
+metrics.Counter(
+    "cache_hits_total", "Cache lookups that hit.", ("cache",),
+    collect=lambda: {("activity",): activity_cache.hits, ("profile",): profile_cache.hits},
+)
+metrics.Counter(
+    "cache_misses_total", "Cache lookups that missed.", ("cache",),
+    collect=lambda: {("activity",): activity_cache.misses, ("profile",): profile_cache.misses},
+)
+metrics.Gauge(
+    "cache_entries", "Entries held by each cache.", ("cache",),
+    collect=lambda: {("activity",): len(activity_cache), ("profile",): len(profile_cache)},
+)
+metrics.Gauge("banner_fetches_pending", "Users queued for a banner fetch.", collect=lambda: banner_resolver.pending)
 
 
 def serialize_activity(activity: discord.Activity):
@@ -87,7 +204,7 @@ def serialize_activity(activity: discord.Activity):
                 data["emoji"] = {"name": str(activity.emoji)}
     elif isinstance(activity, discord.Game):
         pass  # Covered by generic fields
-    elif isinstance(activity, discord.StreamingActivity):
+    elif isinstance(activity, discord.Streaming):
         data.update({
             "platform": getattr(activity, "platform", None),
             "url": getattr(activity, "url", None),
@@ -102,8 +219,8 @@ def serialize_activity(activity: discord.Activity):
             "duration": activity.duration.total_seconds() if activity.duration else None,
         })
 
-    # Assets
-    if hasattr(activity, "assets"):
+    # Assets (Game and Streaming have raw assets but no image URLs)
+    if hasattr(activity, "large_image_url"):
         assets = {}
         if activity.large_image_url:
             assets["large_image_url"] = str(activity.large_image_url)
@@ -124,96 +241,276 @@ def serialize_activity(activity: discord.Activity):
     return {k: v for k, v in data.items() if v is not None}
 
 
-async def build_snapshot():
+def serialize_guild(guild: discord.Guild) -> dict:
     """
-    Build a live snapshot of all guilds and members.
-    Called on each API request.
+    Serialize the guild header (everything except the member list).
     """
-    now = datetime.datetime.utcnow().isoformat() + "Z"
-    result = {
-        "generated_at": now,
-        "guilds": []
+    return {
+        "id": str(guild.id),
+        "name": guild.name,
+        "icon_url": guild.icon.url if guild.icon else None,
+        "member_count": guild.member_count or len(guild.members),
     }
 
+
+def serialize_role(role: discord.Role) -> dict:
+    return {
+        "id": str(role.id),
+        "name": role.name,
+        "color": role.color.value if role.color.value != 0 else None,
+        "position": role.position,
+    }
+
+
+def serialize_member(member: discord.Member) -> MemberRecord:
+    """
+    Serialize a single guild member to the compact record kept in the store.
+    """
+    # underlying user object
+    user = member._user if hasattr(member, "_user") else member
+
+    # avatar
+    avatar_url = str(member.display_avatar.url) if member.display_avatar else None
+
+    # badges via public_flags
+    badges = ()
+    try:
+        if getattr(user, "public_flags", None):
+            badges = tuple(flag.name for flag in user.public_flags.all())
+    except Exception:
+        badges = ()
+
+    # status
+    status = str(member.status) if hasattr(member, "status") else "offline"
+
+    # banner / accent color from the profile cache; misses are queued for
+    # the background resolver and patched in once they arrive. Until then a
+    # user the snapshot already has (e.g. evicted from the cache) keeps the
+    # banner it shows rather than going back to pending.
+    profile = banner_resolver.lookup(member.id, OFFLINE if status == "offline" else ONLINE)
+    if profile is not None:
+        banner = (profile.banner_url, profile.accent_color, False)
+    else:
+        known = snapshot_store.find_user(member.id)
+        if known is not None:
+            banner = (known.banner_url, known.accent_color, known.banner_pending)
+        else:
+            banner = (None, None, True)
+
+    # activities as structured list; identical activities are serialized once
+    activities = []
+    for activity in member.activities or []:
+        try:
+            serialized = activity_cache.get(activity, serialize_activity)
+        except Exception:
+            continue
+        if serialized:
+            activities.append(serialized)
+
+    # roles (skip @everyone); names, colors and positions live in the
+    # guild's role table
+    role_ids = tuple(sorted(role.id for role in member.roles if not role.is_default()))
+
+    return MemberRecord(
+        id=member.id,
+        name=user.name,
+        discriminator=user.discriminator,
+        global_name=getattr(user, "global_name", None),
+        display_name=member.display_name,
+        nick=member.nick,
+        avatar_url=avatar_url,
+        banner_url=banner[0],
+        banner_pending=banner[2],
+        accent_color=banner[1],
+        badges=badges,
+        status=status_code(status),
+        activities=tuple(activities),
+        joined_at=to_micros(member.joined_at),
+        role_ids=role_ids,
+    )
+
+
+def heartbeat_latency_ms():
+    # bot.latency is NaN until the first heartbeat is acknowledged
+    latency = bot.latency
+    return None if math.isnan(latency) else round(latency * 1000, 1)
+
+
+async def build_snapshot() -> dict:
+    """
+    Chunk every guild and rebuild the whole store from the gateway cache,
+    then return the build's timing. Used to (re)seed snapshot_store; events
+    keep it current afterwards.
+
+    Guilds are chunked by chunk_scheduler and each one is loaded as soon as
+    its members are in, serialized in slices of at most SNAPSHOT_MAX_SLICE
+    seconds. The event loop's lag is measured meanwhile, so the stats show
+    whether the build got in the way of anything else.
+    """
+    probe = LoopLagProbe().start()
+    started = time.perf_counter()
+    latency_before = heartbeat_latency_ms()
+    slices_before = snapshot_slicer.slices
+
+    # room for everyone in the snapshot (at least; users in several guilds
+    # count more than once), so the profile cache doesn't churn
+    profile_cache.reserve(sum(guild.member_count or 0 for guild in bot.guilds))
+    chunk_scheduler.schedule(bot.guilds)
+    await chunk_scheduler.wait()
+
+    current = {guild.id for guild in bot.guilds}
+    for guild_id in list(snapshot_store.guilds):
+        if guild_id not in current:
+            snapshot_store.remove_guild(guild_id)
+    freeze_heap()
+
+    duration = time.perf_counter() - started
+    SNAPSHOT_BUILD_SECONDS.observe(duration)
+    last_snapshot_build.clear()
+    last_snapshot_build.update({
+        "finished_at": time.time(),
+        "duration_ms": round(duration * 1000, 1),
+        "guilds": len(snapshot_store.guilds),
+        "members": sum(len(members) for members in snapshot_store.members.values()),
+        "max_slice_ms": SNAPSHOT_MAX_SLICE * 1000,
+        "slices": snapshot_slicer.slices - slices_before + 1,
+        "chunking": chunk_scheduler.progress(),
+        "loop_lag": await probe.stop(),
+        "heartbeat_latency_ms": {"before": latency_before, "after": heartbeat_latency_ms()},
+    })
+    return last_snapshot_build
+
+
+def freeze_heap():
+    """
+    Exempt everything allocated so far, mostly the snapshot, from garbage
+    collection scans. A full collection walks every tracked object while
+    holding the GIL, so with a big snapshot in memory one takes hundreds
+    of ms, and it can be triggered by any allocation-heavy work, even in a
+    worker thread (e.g. columnar variants). Frozen objects are still freed
+    as soon as nothing references them; only reference cycles among them
+    would linger, and the snapshot has none.
+    """
+    gc.freeze()
+
+
+# ---------- LIVE SNAPSHOT UPDATES ----------
+
+def _mark_changed(guild_id: int, member_id: int):
+    changed = _rebuilding.get(guild_id)
+    if changed is not None:
+        changed.add(member_id)
+
+
+async def refresh_member(member: discord.Member):
+    _mark_changed(member.guild.id, member.id)
+    snapshot_store.upsert_member(member.guild.id, serialize_member(member))
+
+
+async def refresh_guild(guild: discord.Guild, slicer: TimeSlicer = None):
+    """
+    (Re)load one guild with all of its members and roles into the store.
+
+    Serialization and indexing yield to the event loop between slices (see
+    TimeSlicer). Members that change in the meantime are re-read once the
+    guild is in, and roles are brought up to date the same way; a guild the
+    bot left in the meantime is dropped.
+    """
+    slicer = slicer or snapshot_slicer
+    changed = _rebuilding[guild.id] = set()
+    try:
+        members = {}
+        for member in list(guild.members):
+            members[member.id] = serialize_member(member)
+            await slicer.tick()
+        roles = {role.id: serialize_role(role) for role in guild.roles if not role.is_default()}
+        index = await GuildIndex.build(members, roles, slicer.tick)
+        if bot.get_guild(guild.id) is None:
+            # removed (and forgotten by on_guild_remove) while we were busy
+            return
+        snapshot_store.set_guild(serialize_guild(guild), members.values(), roles.values(), index)
+    finally:
+        _rebuilding.pop(guild.id, None)
+
+    # set_role is a no-op for unchanged roles and re-indexes the holders of
+    # one that moved
+    current = {role.id: serialize_role(role) for role in guild.roles if not role.is_default()}
+    for role_id in roles.keys() - current.keys():
+        snapshot_store.remove_role(guild.id, role_id)
+    for role in current.values():
+        snapshot_store.set_role(guild.id, role)
+
+    for member_id in changed:
+        member = guild.get_member(member_id)
+        if member is None:
+            snapshot_store.remove_member(guild.id, member_id)
+        else:
+            snapshot_store.upsert_member(guild.id, serialize_member(member))
+
+
+@bot.event
+async def on_member_join(member: discord.Member):
+    snapshot_store.update_guild(serialize_guild(member.guild))
+    await refresh_member(member)
+
+
+@bot.event
+async def on_member_remove(member: discord.Member):
+    snapshot_store.update_guild(serialize_guild(member.guild))
+    _mark_changed(member.guild.id, member.id)
+    snapshot_store.remove_member(member.guild.id, member.id)
+
+
+@bot.event
+async def on_member_update(before: discord.Member, after: discord.Member):
+    await refresh_member(after)
+
+
+@bot.event
+async def on_presence_update(before: discord.Member, after: discord.Member):
+    await refresh_member(after)
+
+
+@bot.event
+async def on_user_update(before: discord.User, after: discord.User):
+    # name / avatar / flags are shared by every guild the user is in
     for guild in bot.guilds:
-        guild_data = {
-            "id": str(guild.id),
-            "name": guild.name,
-            "icon_url": guild.icon.url if guild.icon else None,
-            "member_count": guild.member_count or len(guild.members),
-            "members": []
-        }
-
-        for member in guild.members:
-            # underlying user object
-            user = member._user if hasattr(member, "_user") else member
-
-            # avatar
-            avatar_url = str(member.display_avatar.url) if member.display_avatar else None
-
-            # banner via cache
-            banner_url = await get_banner_url(member)
-
-            # badges via public_flags
-            badges = []
-            try:
-                if getattr(user, "public_flags", None):
-                    badges = [flag.name for flag in user.public_flags.all()]
-            except Exception:
-                badges = []
+        member = guild.get_member(after.id)
+        if member is not None:
+            await refresh_member(member)
 
-            # status
-            status = str(member.status) if hasattr(member, "status") else "offline"
 
-            # activities as structured list
-            activities = []
-            try:
-                for activity in member.activities or []:
-                    serialized = serialize_activity(activity)
-                    if serialized:
-                        activities.append(serialized)
-            except Exception:
-                pass
-
-            # roles (skip @everyone)
-            roles = [
-                {
-                    "id": str(role.id),
-                    "name": role.name,
-                    "color": role.color.value if role.color.value != 0 else None,
-                    "position": role.position,
-                }
-                for role in member.roles
-                if not role.is_default()
-            ]
-            roles.sort(key=lambda r: r["position"], reverse=True)
-
-            member_obj = {
-                "id": str(member.id),
-                "name": user.name,
-                "discriminator": user.discriminator,
-                "global_name": getattr(user, "global_name", None),
-                "display_name": member.display_name,
-                "nick": member.nick,
-                "avatar_url": avatar_url,
-                "banner_url": banner_url,
-                "accent_color": user.accent_color.value if getattr(user, "accent_color", None) else None,
-                "badges": badges,
-                "status": status,
-                "activities": activities,
-                "joined_at": member.joined_at.isoformat() if member.joined_at else None,
-                "roles": roles,
-            }
-
-            guild_data["members"].append(member_obj)
-
-        guild_data["members"].sort(
-            key=lambda m: (m["display_name"] or m["name"] or "").lower()
-        )
-        result["guilds"].append(guild_data)
-
-    result["guilds"].sort(key=lambda g: g["name"].lower())
-    return result
+@bot.event
+async def on_guild_role_create(role: discord.Role):
+    snapshot_store.set_role(role.guild.id, serialize_role(role))
+
+
+@bot.event
+async def on_guild_role_update(before: discord.Role, after: discord.Role):
+    # holders pick up the new name / color / position from the role table
+    snapshot_store.set_role(after.guild.id, serialize_role(after))
+
+
+@bot.event
+async def on_guild_role_delete(role: discord.Role):
+    snapshot_store.remove_role(role.guild.id, role.id)
+
+
+@bot.event
+async def on_guild_join(guild: discord.Guild):
+    profile_cache.reserve(len(profile_cache) + (guild.member_count or 0))
+    chunk_scheduler.request(guild, URGENT)
+
+
+@bot.event
+async def on_guild_remove(guild: discord.Guild):
+    chunk_scheduler.forget(guild.id)
+    snapshot_store.remove_guild(guild.id)
+
+
+@bot.event
+async def on_guild_update(before: discord.Guild, after: discord.Guild):
+    snapshot_store.update_guild(serialize_guild(after))
 
 
 # ---------- AIOHTTP API WITH CORS ----------
@@ -222,76 +519,436 @@ def cors_headers():
     return {
         "Access-Control-Allow-Origin": "*",
         "Access-Control-Allow-Methods": "GET, OPTIONS",
-        "Access-Control-Allow-Headers": "Content-Type",
+        "Access-Control-Allow-Headers": "Content-Type, If-None-Match",
+        "Access-Control-Expose-Headers": "ETag",
     }
 
 
+def json_response(data, status: int = 200) -> web.Response:
+    """
+    Like web.json_response, but encoded with the configured json_backend.
+    """
+    return web.Response(body=json_backend.dumps(data), status=status, content_type="application/json", headers=cors_headers())
+
+
+def etag_matches(request: web.Request, etag: str) -> bool:
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return False
+    value = etag.strip('"')
+    return any(tag.value == value or tag.value == "*" for tag in if_none_match)
+
+
+def negotiate_encoding(request: web.Request) -> str:
+    """
+    Pick the preferred Content-Encoding from COMPRESSORS that the client
+    accepts (honouring q=0), or "identity".
+    """
+    accepted = {}
+    for part in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.lower()] = q
+
+    for encoding in COMPRESSORS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return "identity"
+
+
+def int_param(value: str, name: str) -> int:
+    """
+    ``value`` as an int; raises ValueError naming the parameter otherwise.
+    """
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+
+
+def snapshot_format(request: web.Request) -> str:
+    """
+    The ?format= of a snapshot request, one of FORMATS. Raises ValueError.
+    """
+    fmt = request.query.get("format", "full")
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    return fmt
+
+
 async def snapshot_handler(request: web.Request):
-    snapshot = await build_snapshot()
-    return web.json_response(snapshot, headers=cors_headers())
+    """
+    Serve the cached snapshot bytes in the negotiated encoding. While the
+    store keeps changing, this may be a variant a moment older than the
+    current version (see SnapshotStore.variant); the ETag says which.
+    A matching If-None-Match gets a 304.
+
+    ?format=normalized returns the normalized format (see
+    SnapshotStore.normalized_snapshot), which is much smaller for
+    role-heavy guilds and users in several guilds.
+    """
+    try:
+        fmt = snapshot_format(request)
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+
+    encoding = negotiate_encoding(request)
+    version, body = await snapshot_store.variant(fmt, encoding)
+    etag = snapshot_store.etag(encoding, fmt, version)
+    headers = {**cors_headers(), "ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request, etag):
+        return web.Response(status=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return web.Response(body=body, content_type="application/json", headers=headers)
+
+
+async def snapshot_msgpack_handler(request: web.Request):
+    """
+    The columnar snapshot (see columnar.py) as MessagePack, with the same
+    ETag / compression handling as /api/snapshot.
+    """
+    if columnar.packb is None:
+        return json_response({"error": "msgpack export needs msgpack or msgspec installed"}, status=501)
+
+    encoding = negotiate_encoding(request)
+    version, body = await snapshot_store.variant("msgpack", encoding)
+    etag = snapshot_store.etag(encoding, "msgpack", version)
+    headers = {**cors_headers(), "ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request, etag):
+        return web.Response(status=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return web.Response(body=body, content_type="application/msgpack", headers=headers)
+
+
+async def snapshot_delta_handler(request: web.Request):
+    """
+    Changes since ?since=<version>. Falls back to the full snapshot
+    (with "full": true) when the client is too far behind.
+    """
+    try:
+        since = int_param(request.query.get("since", "0"), "since")
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+
+    delta = snapshot_store.delta(since, request.query.get("epoch"))
+    if delta is None:
+        delta = dict(snapshot_store.snapshot(), full=True)
+    return json_response(delta)
+
+
+# NDJSON export lines are buffered up to this many bytes per write
+NDJSON_CHUNK = 64 * 1024
+
+
+async def snapshot_ndjson_handler(request: web.Request):
+    """
+    Streaming export of the full snapshot as NDJSON (see
+    SnapshotStore.ndjson_lines), written in NDJSON_CHUNK pieces so memory
+    stays flat regardless of guild size. Compressed when the client
+    accepts it.
+    """
+    response = web.StreamResponse(headers={
+        **cors_headers(),
+        "Content-Type": "application/x-ndjson",
+        "Cache-Control": "no-cache",
+    })
+    response.enable_compression()
+    await response.prepare(request)
+
+    buffer = bytearray()
+    try:
+        for line in snapshot_store.ndjson_lines():
+            buffer += line
+            if len(buffer) >= NDJSON_CHUNK:
+                await response.write(bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await response.write(bytes(buffer))
+        await response.write_eof()
+    except ConnectionResetError:
+        pass
+    return response
+
+
+# Page size limits for /api/guilds/{id}/members
+MEMBERS_PAGE_DEFAULT = 100
+MEMBERS_PAGE_MAX = 1000
+
+
+async def guilds_handler(request: web.Request):
+    return json_response({
+        "epoch": snapshot_store.epoch,
+        "version": snapshot_store.version,
+        "guilds": [dict(guild, state=guild_state(int(guild["id"]))) for guild in snapshot_store.guild_list()],
+    })
+
+
+async def stats_handler(request: web.Request):
+    return json_response({
+        "heartbeat_latency_ms": heartbeat_latency_ms(),
+        "activity_cache": activity_cache.stats(),
+        "snapshot_build": last_snapshot_build or None,
+        "chunking": chunk_scheduler.progress(),
+        "startup": dict(cog_loader.report(), ready_s=startup_ready_s),
+        "commands": command_tracer.report(),
+        "loop": loop_watchdog.report(),
+    })
+
+
+async def guild_members_handler(request: web.Request):
+    """
+    Cursor-paginated members of one guild.
+
+    ?q= matches display name / username, ?status= takes one or more
+    comma-separated statuses, ?role= a role ID, and ?sort= is one of
+    name (default), status or role. Cursors belong to the sort they came from.
+    """
+    query = request.query
+    try:
+        guild_id = int_param(request.match_info["guild_id"], "guild ID")
+        limit = min(max(int_param(query.get("limit", MEMBERS_PAGE_DEFAULT), "limit"), 1), MEMBERS_PAGE_MAX)
+        sort = query.get("sort", "name")
+        if sort not in SORTS:
+            raise ValueError(f"sort must be one of {', '.join(SORTS)}")
+        role_id = int_param(query["role"], "role") if query.get("role") else None
+        statuses = [status for status in query.get("status", "").split(",") if status]
+        cursor = query.get("cursor")
+        after = decode_cursor(cursor) if cursor else None
+        if after is not None and not GuildIndex.valid_key(sort, after):
+            raise ValueError("cursor does not match sort")
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+
+    # someone is waiting on this guild: chunk it next if it's still queued
+    chunk_scheduler.prioritize(guild_id)
+    if guild_id not in snapshot_store.guilds:
+        state = chunk_scheduler.state(guild_id)
+        if state is not None:
+            return json_response({"error": "guild is still loading", "state": state}, status=503)
+        return json_response({"error": "unknown guild"}, status=404)
+
+    members, next_key = snapshot_store.query_members(
+        guild_id, q=query.get("q", ""), statuses=statuses, role_id=role_id, sort=sort, after=after, limit=limit,
+    )
+    # someone is looking at these right now: resolve their banners first
+    banner_resolver.prioritize(int(m["id"]) for m in members if m["banner_pending"])
+    return json_response({
+        "epoch": snapshot_store.epoch,
+        "version": snapshot_store.version,
+        "guild": snapshot_store.guilds[guild_id],
+        "state": guild_state(guild_id),
+        "members": members,
+        "next_cursor": encode_cursor(next_key) if next_key else None,
+    })
+
+
+# Stream settings: idle connections get a comment line every STREAM_HEARTBEAT
+# seconds, and changes arriving within STREAM_BATCH seconds go out as one delta.
+STREAM_HEARTBEAT = 15.0
+STREAM_BATCH = 0.25
+
+
+def sse_event(event: str, version: int, payload: bytes) -> bytes:
+    event_id = f"{snapshot_store.epoch}:{version}"
+    return f"id: {event_id}\nevent: {event}\ndata: ".encode() + payload + b"\n\n"
+
+
+async def stream_handler(request: web.Request):
+    """
+    Server-Sent Events push of snapshot changes.
+
+    Sends a "snapshot" event first (or a "delta" when resuming via
+    Last-Event-ID / ?since=&epoch=), then a "delta" event whenever members
+    change, and a heartbeat comment while idle. ?format= picks the format
+    of "snapshot" events; deltas always use the full member format.
+    """
+    try:
+        fmt = snapshot_format(request)
+    except ValueError as e:
+        return json_response({"error": str(e)}, status=400)
+
+    response = web.StreamResponse(headers={
+        **cors_headers(),
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+    await response.prepare(request)
+
+    # resume position, "epoch:version" as sent in our event ids
+    last_id = request.headers.get("Last-Event-ID", "")
+    epoch, _, since = last_id.partition(":")
+    if not since:
+        epoch, since = request.query.get("epoch"), request.query.get("since")
+    try:
+        since = int(since) if since else None
+    except ValueError:
+        since = None
+
+    try:
+        delta = snapshot_store.delta(since, epoch) if since is not None else None
+        if delta is None:
+            version, body = await snapshot_store.variant(fmt)
+            await response.write(sse_event("snapshot", version, body))
+        else:
+            if delta["guilds"] or delta["removed_guilds"]:
+                await response.write(sse_event("delta", delta["version"], json_backend.dumps(delta)))
+            version = delta["version"]
+
+        while True:
+            if not await snapshot_store.wait_for_change(version, STREAM_HEARTBEAT):
+                await response.write(b": ping\n\n")
+                continue
+
+            await asyncio.sleep(STREAM_BATCH)
+            delta = snapshot_store.delta(version, snapshot_store.epoch)
+            if delta is None:
+                version, body = await snapshot_store.variant(fmt)
+                await response.write(sse_event("snapshot", version, body))
+            else:
+                await response.write(sse_event("delta", delta["version"], json_backend.dumps(delta)))
+                version = delta["version"]
+    except ConnectionResetError:
+        pass
+
+    return response
 
 
 async def options_handler(request: web.Request):
     return web.Response(status=200, headers=cors_headers())
 
 
-async def start_web_app():
+@web.middleware
+async def metrics_middleware(request: web.Request, handler):
     """
-    Start aiohttp web server on port 5005.
+    Count every request and time it by route; the SSE stream is only
+    counted, since its "latency" is however long the client stays.
     """
-    app = web.Application()
+    resource = request.match_info.route.resource
+    route = resource.canonical if resource is not None else "unmatched"
+    started = time.perf_counter()
+    try:
+        response = await handler(request)
+    except web.HTTPException as e:
+        API_REQUESTS.inc(route, request.method, str(e.status))
+        raise
+
+    API_REQUESTS.inc(route, request.method, str(response.status))
+    if response.content_type != "text/event-stream":
+        API_REQUEST_SECONDS.observe(time.perf_counter() - started, route)
+        # streamed responses are already sent; plain ones are sent after this
+        size = response.body_length if response.prepared else len(getattr(response, "body", None) or b"")
+        API_RESPONSE_BYTES.observe(size, route)
+    return response
+
+
+async def metrics_handler(request: web.Request):
+    return web.Response(
+        body=metrics.render().encode(), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+    )
+
+
+# Where the API listens; benchmarks/bench_http.py starts it on its own port
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", "5005"))
+
+
+async def start_web_app(host: str = API_HOST, port: int = API_PORT) -> web.AppRunner:
+    """
+    Start aiohttp web server on ``host``:``port`` (5005 by default).
+    Returns the runner, for cleanup().
+    """
+    app = web.Application(middlewares=[metrics_middleware])
     app.router.add_route("GET", "/api/snapshot", snapshot_handler)
-    app.router.add_route("OPTIONS", "/api/snapshot", options_handler)
+    app.router.add_route("GET", "/api/snapshot/delta", snapshot_delta_handler)
+    app.router.add_route("GET", "/api/snapshot.ndjson", snapshot_ndjson_handler)
+    app.router.add_route("GET", "/api/snapshot.msgpack", snapshot_msgpack_handler)
+    app.router.add_route("GET", "/api/stream", stream_handler)
+    app.router.add_route("GET", "/api/guilds", guilds_handler)
+    app.router.add_route("GET", "/api/stats", stats_handler)
+    app.router.add_route("GET", "/api/guilds/{guild_id}/members", guild_members_handler)
+    app.router.add_route("GET", "/metrics", metrics_handler)
+    # CORS preflight for every API route
+    for resource in list(app.router.resources()):
+        if resource.canonical.startswith("/api/"):
+            resource.add_route("OPTIONS", options_handler)
 
     runner = web.AppRunner(app)
     await runner.setup()
-    site = web.TCPSite(runner, "0.0.0.0", 5005)
+    site = web.TCPSite(runner, host, port)
     await site.start()
 
-    print("🌐 REST API running at http://127.0.0.1:5005/api/snapshot")
+    print(f"🌐 REST API running at http://127.0.0.1:{port}/api/snapshot")
+    return runner
 
 
 async def load_cogs():
-    for filename in os.listdir(os.path.join(os.path.dirname(__file__), 'commands')):
-        if filename.endswith('.py') and not filename.startswith('__'):
-            try:
-                await bot.load_extension(f'commands.{filename[:-3]}')
-                print(f"✅ Loaded cog: {filename}")
-            except Exception as e:
-                print(f"❌ Failed to load cog {filename}: {e}")
+    await cog_loader.load_all()
 
 @bot.event
 async def on_ready():
-    global _web_started
+    global startup_ready_s
     print(f"✅ Logged in as {bot.user} (ID: {bot.user.id})")
     print("------")
+    if startup_ready_s is None:
+        startup_ready_s = round(time.perf_counter() - STARTED_AT, 2)
+        cog_loader.print_report(startup_ready_s)
     
-    # Chunk members so cache is filled
-    for guild in bot.guilds:
-        try:
-            print(f"🔄 Chunking guild: {guild.name}")
-            await guild.chunk()
-        except Exception as e:
-            print(f"Failed to chunk {guild.name}: {e}")
-
-    if not _web_started:
-        _web_started = True
-        bot.loop.create_task(start_web_app())
-
-    # Sync slash commands after cogs are loaded and bot is ready
+    # Chunk guilds and seed the live snapshot; events keep it current from
+    # here on. on_ready fires again after a reconnect: guilds whose member
+    # cache survived skip the chunk request and are only reloaded.
+    profile_cache.start()
+    banner_resolver.start()
+    chunk_scheduler.start()
+    await build_snapshot()
+    snapshot_persister.start()
+
+    # Sync slash commands after cogs are loaded and bot is ready, but only if
+    # they changed since the last sync (/sync forces one). Deferred cogs'
+    # commands aren't in the tree, so syncing now would unregister them.
+    if cog_loader.deferred:
+        print("Lazy cogs: skipping command sync (use /sync after changing commands)")
+        return
     try:
-        synced = await bot.tree.sync()
-        print(f"Synced {len(synced)} command(s)")
+        result = await sync_commands(bot)
+        if result["synced"]:
+            print(f"Synced {result['commands']} command(s) in {result['seconds']:.2f} s")
+        else:
+            print(f"Command tree unchanged ({result['fingerprint'][:12]}), skipped sync")
     except Exception as e:
         print(f"Error syncing commands: {e}")
 
 
 async def main():
-    async with bot:
-        await load_cogs()
-        if not TOKEN:
-            raise SystemExit("DISCORD_TOKEN not found in .env")
-        await bot.start(TOKEN)
+    loop_watchdog.start()
+    try:
+        async with bot:
+            await load_cogs()
+            if not TOKEN:
+                raise SystemExit("DISCORD_TOKEN not found in .env")
+
+            # serve the last saved snapshot while we connect and chunk
+            if await snapshot_persister.load():
+                freeze_heap()
+                print(f"📂 Loaded saved snapshot from {SNAPSHOT_PATH}")
+            await start_web_app()
+
+            await bot.start(TOKEN)
+    finally:
+        profile_cache.close()
+        try:
+            snapshot_persister.save_now()
+        except OSError as e:
+            print(f"Failed to write snapshot {SNAPSHOT_PATH}: {e}")
 
 if __name__ == "__main__":
     asyncio.run(main())
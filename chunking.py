@@ -0,0 +1,171 @@
+# chunking.py
+import asyncio
+import itertools
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+import discord
+
+# Guild readiness states, as shown by the API
+PENDING = "pending"      # waiting for its turn
+CHUNKING = "chunking"    # member chunk request in flight
+READY = "ready"          # all members cached and loaded into the snapshot
+PARTIAL = "partial"      # chunking failed; loaded with whatever was cached
+
+# Scheduler priorities, lower runs first
+URGENT = 0   # someone is looking at this guild right now
+NORMAL = 1
+
+# Give up on a single guild's chunk request after this many seconds
+CHUNK_TIMEOUT = 120.0
+# Print progress at most this often, in seconds
+PROGRESS_INTERVAL = 5.0
+
+
+class ChunkScheduler:
+    """
+    Requests member chunks for guilds with at most ``concurrency`` requests
+    in flight, smallest guilds first (so most guilds are ready early) unless
+    one is ``prioritize``d. Guilds whose member cache is already complete
+    skip the request.
+
+    Once a guild's members are in, ``on_chunked(guild)`` loads it into the
+    snapshot and the guild is marked READY (or PARTIAL if chunking failed).
+    """
+
+    def __init__(
+        self,
+        on_chunked: Callable[[discord.Guild], Awaitable[None]],
+        concurrency: int = 4,
+        timeout: float = CHUNK_TIMEOUT,
+    ):
+        self.on_chunked = on_chunked
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+        self.states: Dict[int, str] = {}
+        self._queue: "asyncio.PriorityQueue" = asyncio.PriorityQueue()
+        self._pending: Dict[int, int] = {}  # guild ID -> best queued priority
+        self._guilds: Dict[int, discord.Guild] = {}
+        self._seq = itertools.count()
+        self._workers = []
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._in_flight = 0
+
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._last_progress = 0.0
+
+    def start(self):
+        if self._workers:
+            return
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    # ---------- scheduling ----------
+
+    def request(self, guild: discord.Guild, priority: int = NORMAL):
+        """
+        Queue a guild, or raise the priority of a queued one. Guilds that
+        are being chunked right now are left alone.
+        """
+        if self.states.get(guild.id) == CHUNKING:
+            return
+        queued = self._pending.get(guild.id)
+        if queued is not None and queued <= priority:
+            return
+        if not self._pending and not self._in_flight:
+            self._started_at = time.monotonic()
+            self._finished_at = None
+        self._pending[guild.id] = priority
+        self._guilds[guild.id] = guild
+        self.states[guild.id] = PENDING
+        self._idle.clear()
+        self._queue.put_nowait((priority, guild.member_count or 0, next(self._seq), guild.id))
+
+    def schedule(self, guilds: Iterable[discord.Guild]):
+        for guild in guilds:
+            self.request(guild)
+
+    def prioritize(self, guild_id: int):
+        guild = self._guilds.get(guild_id)
+        if guild is not None and guild_id in self._pending:
+            self.request(guild, URGENT)
+
+    def forget(self, guild_id: int):
+        self._pending.pop(guild_id, None)
+        self._guilds.pop(guild_id, None)
+        self.states.pop(guild_id, None)
+        self._check_idle()
+
+    async def wait(self):
+        """
+        Wait until every scheduled guild is loaded.
+        """
+        await self._idle.wait()
+
+    # ---------- progress ----------
+
+    def state(self, guild_id: int) -> Optional[str]:
+        return self.states.get(guild_id)
+
+    def progress(self) -> dict:
+        counts = {state: 0 for state in (PENDING, CHUNKING, READY, PARTIAL)}
+        for state in self.states.values():
+            counts[state] += 1
+        elapsed = None
+        if self._started_at is not None:
+            elapsed = round((self._finished_at or time.monotonic()) - self._started_at, 1)
+        return dict(counts, total=len(self.states), elapsed_s=elapsed)
+
+    def _report(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_progress < PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+        p = self.progress()
+        done = p[READY] + p[PARTIAL]
+        print(f"🔄 Chunking: {done}/{p['total']} guilds loaded, {p[CHUNKING]} in flight ({p['elapsed_s']}s)")
+
+    def _check_idle(self):
+        if not self._pending and not self._in_flight and not self._idle.is_set():
+            self._finished_at = time.monotonic()
+            self._report(force=True)
+            self._idle.set()
+
+    # ---------- workers ----------
+
+    async def _chunk(self, guild: discord.Guild) -> bool:
+        if guild.chunked:
+            return True
+        try:
+            await asyncio.wait_for(guild.chunk(), self.timeout)
+            return True
+        except Exception as e:
+            print(f"Failed to chunk {guild.name}: {e!r}")
+            return False
+
+    async def _worker(self):
+        while True:
+            priority, _, _, guild_id = await self._queue.get()
+            # stale entry: already handled, forgotten, or re-queued with a better priority
+            if self._pending.get(guild_id) != priority:
+                continue
+            del self._pending[guild_id]
+            guild = self._guilds[guild_id]
+
+            self._in_flight += 1
+            self.states[guild_id] = CHUNKING
+            try:
+                complete = await self._chunk(guild)
+                await self.on_chunked(guild)
+                if guild_id in self.states:
+                    self.states[guild_id] = READY if complete else PARTIAL
+            except Exception as e:
+                print(f"Failed to load {guild.name}: {e!r}")
+                if guild_id in self.states:
+                    self.states[guild_id] = PARTIAL
+            finally:
+                self._in_flight -= 1
+                self._report()
+                self._check_idle()
@@ -0,0 +1,243 @@
+# cog_loader.py
+import ast
+import asyncio
+import importlib
+import os
+import time
+from typing import Dict, List, Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+# decorators that register a command under their name= (or the function name)
+_COMMAND_DECORATORS = {"command", "hybrid_command", "group", "hybrid_group"}
+
+
+def _parse(path: str) -> Optional[ast.Module]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return ast.parse(f.read(), path)
+    except (OSError, SyntaxError):
+        return None
+
+
+def command_names(path: str) -> Optional[List[str]]:
+    """
+    Top-level command names and aliases a cog file registers, read from its
+    source without importing it. None if the cog has event listeners (or
+    can't be parsed), since it then has to be loaded up front.
+    """
+    tree = _parse(path)
+    if tree is None:
+        return None
+
+    names = []
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for decorator in node.decorator_list:
+            call = decorator if isinstance(decorator, ast.Call) else None
+            func = call.func if call else decorator
+            attr = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", None)
+            if attr == "listener":
+                return None
+            if attr not in _COMMAND_DECORATORS:
+                continue
+            keywords = {kw.arg: kw.value for kw in call.keywords} if call else {}
+            name = keywords.get("name")
+            names.append(name.value if isinstance(name, ast.Constant) else node.name)
+            aliases = keywords.get("aliases")
+            if isinstance(aliases, (ast.List, ast.Tuple)):
+                names.extend(alias.value for alias in aliases.elts if isinstance(alias, ast.Constant))
+    return names
+
+
+def dependencies(path: str) -> List[str]:
+    """
+    Modules a cog file imports at the top level (absolute imports only),
+    read from its source.
+    """
+    tree = _parse(path)
+    if tree is None:
+        return []
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules.append(node.module)
+    return modules
+
+
+def _warm(modules: List[str]):
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception:
+            pass  # load_extension reports it
+
+
+class CogLoader:
+    """
+    Loads the extensions in ``package`` (one per .py file) and records how
+    long each one took.
+
+    Each cog's dependencies are imported in worker threads side by side
+    first ("deps_ms", near zero for ones already imported), then
+    ``load_extension`` executes the cog module and runs its ``setup`` on
+    the event loop ("load_ms"). The cog modules themselves aren't imported
+    ahead: ``load_extension`` always executes them afresh. With ``lazy``, cogs without event listeners aren't loaded at all
+    until one of their commands is invoked (see ``install``).
+    """
+
+    def __init__(self, bot: commands.Bot, package: str = "commands", lazy: bool = False):
+        self.bot = bot
+        self.package = package
+        self.lazy = lazy
+        self.directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), package)
+
+        # extension -> {"deps_ms", "load_ms", "error"}; deferred cogs get
+        # theirs once loaded, with "on_first_use" set
+        self.timings: Dict[str, dict] = {}
+        # command name -> extension, for lazy cogs that aren't loaded yet
+        self.deferred: Dict[str, str] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def extensions(self) -> List[str]:
+        return sorted(
+            f"{self.package}.{filename[:-3]}"
+            for filename in os.listdir(self.directory)
+            if filename.endswith(".py") and not filename.startswith("__")
+        )
+
+    # ---------- loading ----------
+
+    def _path(self, extension: str) -> str:
+        return os.path.join(self.directory, extension.rsplit(".", 1)[1] + ".py")
+
+    async def _load(self, extension: str, deps_ms: Optional[float] = None):
+        timing = self.timings.setdefault(extension, {"deps_ms": deps_ms, "load_ms": None, "error": None})
+        start = time.perf_counter()
+        try:
+            await self.bot.load_extension(extension)
+        except commands.ExtensionAlreadyLoaded:
+            return
+        except Exception as e:
+            timing["error"] = str(e)
+            print(f"❌ Failed to load cog {extension}: {e}")
+            return
+        timing["load_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        print(f"✅ Loaded cog: {extension}")
+
+    async def _warm(self, extension: str) -> float:
+        start = time.perf_counter()
+        await asyncio.to_thread(_warm, dependencies(self._path(extension)))
+        return round((time.perf_counter() - start) * 1000, 1)
+
+    async def load_all(self):
+        """
+        Load every extension, or with ``lazy`` only those that must be
+        loaded up front; the rest wait in ``deferred``.
+        """
+        eager = []
+        for extension in self.extensions():
+            names = command_names(self._path(extension))
+            if self.lazy and names:
+                for name in names:
+                    self.deferred[name] = extension
+            else:
+                eager.append(extension)
+
+        deps_times = await asyncio.gather(*(self._warm(extension) for extension in eager))
+        # loading stays sequential so cogs register in a stable order
+        for extension, deps_ms in zip(eager, deps_times):
+            await self._load(extension, deps_ms)
+
+    async def ensure(self, command_name: str) -> bool:
+        """
+        Load the deferred cog that provides ``command_name``, if any.
+        Returns True if a cog was loaded.
+        """
+        extension = self.deferred.get(command_name)
+        if extension is None:
+            return False
+        lock = self._locks.setdefault(extension, asyncio.Lock())
+        async with lock:
+            if extension in self.bot.extensions:
+                return False
+            await self._load(extension)
+            self.timings[extension]["on_first_use"] = True
+            for name in [n for n, ext in self.deferred.items() if ext == extension]:
+                del self.deferred[name]
+        return True
+
+    async def load_deferred(self):
+        """
+        Load every deferred cog now (e.g. before syncing the command tree).
+        """
+        for name in list(self.deferred):
+            await self.ensure(name)
+
+    def install(self):
+        """
+        Hook prefix command processing so a message invoking a deferred
+        command loads its cog first. Slash commands go through
+        LazyCommandTree, which the bot must be created with.
+        """
+        process_commands = self.bot.process_commands
+
+        async def lazy_process_commands(message: discord.Message):
+            if self.deferred and not message.author.bot:
+                ctx = await self.bot.get_context(message)
+                if ctx.command is None and ctx.invoked_with:
+                    await self.ensure(ctx.invoked_with)
+            await process_commands(message)
+
+        self.bot.process_commands = lazy_process_commands
+
+    # ---------- report ----------
+
+    def report(self) -> dict:
+        return {
+            "lazy": self.lazy,
+            "cogs": self.timings,
+            "deferred": sorted(set(self.deferred.values())),
+        }
+
+    def print_report(self, ready_s: Optional[float] = None):
+        print("⏱️  Startup profile:")
+        for extension, timing in self.timings.items():
+            parts = [f"{key[:-3]} {value} ms" for key, value in timing.items() if key.endswith("_ms") and value is not None]
+            if timing.get("on_first_use"):
+                parts.append("loaded on first use")
+            if timing.get("error"):
+                parts.append("failed")
+            print(f"   {extension:<24} {', '.join(parts)}")
+        for extension in sorted(set(self.deferred.values())):
+            print(f"   {extension:<24} deferred")
+        if ready_s is not None:
+            print(f"   on_ready after {ready_s:.2f} s")
+
+
+class LazyCommandTree(app_commands.CommandTree):
+    """
+    Command tree that loads a deferred cog (see CogLoader) before an
+    interaction for one of its slash commands is dispatched. It also starts
+    the command's trace (see command_trace.py), so slash commands are timed
+    from here, cog loading and checks included.
+    """
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        tracer = getattr(self.client, "command_tracer", None)
+        if tracer is not None and interaction.type == discord.InteractionType.application_command:
+            tracer.start()
+
+        loader: Optional[CogLoader] = getattr(self.client, "cog_loader", None)
+        if loader is not None and loader.deferred and interaction.type in (
+            discord.InteractionType.application_command, discord.InteractionType.autocomplete,
+        ):
+            name = (interaction.data or {}).get("name")
+            if name:
+                await loader.ensure(name)
+        return True
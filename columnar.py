@@ -0,0 +1,221 @@
+# columnar.py
+"""
+Columnar snapshot layout, for /api/snapshot?format=columnar and the
+MessagePack export at /api/snapshot.msgpack.
+
+Each guild carries its ``roles`` table and one array per member field
+(``columns``) instead of one object per member. Strings are indexes into
+the top-level ``strings`` table, activities are indexes into ``activities``
+(whose ``type`` is an index into ``activity_types``), statuses are indexes
+into ``statuses`` and ``joined_at`` is microseconds since the Unix epoch.
+Member and role IDs are strings in JSON, like in the other formats, since
+JavaScript numbers can't hold snowflakes; MessagePack has 64-bit integers,
+so there they are ints (decoders need BigInt support). ``from_columnar``
+turns either back into the full format.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import json_backend
+from member_record import STATUSES, MemberRecord, from_micros
+
+try:
+    import msgpack
+except ImportError:  # optional, see packb below
+    msgpack = None
+
+# discord.ActivityType names, coded by position
+ACTIVITY_TYPES = ("unknown", "playing", "streaming", "listening", "watching", "custom", "competing")
+_ACTIVITY_TYPE_CODES = {name: code for code, name in enumerate(ACTIVITY_TYPES)}
+
+# member fields stored as indexes into the strings table (None stays None)
+STRING_FIELDS = ("name", "discriminator", "global_name", "display_name", "nick", "avatar_url", "banner_url")
+
+
+def _load_packb() -> Optional[Callable[[Any], bytes]]:
+    if msgpack is not None:
+        return msgpack.packb
+    try:
+        import msgspec
+        return msgspec.msgpack.Encoder().encode
+    except ImportError:
+        return None
+
+
+# MessagePack encoder, or None when neither msgpack nor msgspec is installed
+packb = _load_packb()
+
+
+def _msgpack_header(size: int, fix: int, short: bytes, long: bytes) -> bytes:
+    if size < 16:
+        return bytes((fix | size,))
+    if size < 0x10000:
+        return short + size.to_bytes(2, "big")
+    return long + size.to_bytes(4, "big")
+
+
+def encode(snapshot: dict, binary: bool = False) -> bytes:
+    """
+    A columnar snapshot as JSON (json_backend) or, with ``binary``, as
+    MessagePack (packb), one column at a time rather than in one call.
+    The bytes are the same; the point is that a worker thread encoding a
+    big snapshot lets go of the GIL between columns, so the event loop
+    keeps running meanwhile.
+    """
+    dumps = packb if binary else json_backend.dumps
+    parts: List[bytes] = []
+
+    def put_value(key: str, value: Any):
+        parts.append(dumps(value))
+
+    def put_map(value: dict, put_item: Callable[[str, Any], None]):
+        if binary:
+            parts.append(_msgpack_header(len(value), 0x80, b"\xde", b"\xdf"))
+        elif not value:
+            parts.append(b"{}")
+            return
+        for i, (key, item) in enumerate(value.items()):
+            if binary:
+                parts.append(dumps(key))
+            else:
+                parts.append((b"," if i else b"{") + dumps(key) + b":")
+            put_item(key, item)
+        if not binary:
+            parts.append(b"}")
+
+    def put_guild_item(key: str, value: Any):
+        if key == "columns":
+            put_map(value, put_value)
+        else:
+            put_value(key, value)
+
+    def put_snapshot_item(key: str, value: Any):
+        if key != "guilds":
+            put_value(key, value)
+            return
+        parts.append(_msgpack_header(len(value), 0x90, b"\xdc", b"\xdd") if binary else b"[")
+        for i, guild in enumerate(value):
+            if i and not binary:
+                parts.append(b",")
+            put_map(guild, put_guild_item)
+        if not binary:
+            parts.append(b"]")
+
+    put_map(snapshot, put_snapshot_item)
+    return b"".join(parts)
+
+
+class ColumnarBuilder:
+    """
+    Collects the shared ``strings`` and ``activities`` tables while guilds
+    are turned into columns; call ``tables`` once all guilds are done.
+    Member and role IDs come out as strings unless ``string_ids`` is False.
+    """
+
+    def __init__(self, string_ids: bool = True):
+        self.string_ids = string_ids
+        self.strings: List[str] = []
+        self._string_codes: Dict[str, int] = {}
+        self.activities: List[dict] = []
+        # activity dicts are mostly shared objects (see ActivityCache), so
+        # look them up by identity before falling back to their content
+        self._activity_ids: Dict[int, int] = {}
+        self._activity_codes: Dict[bytes, int] = {}
+
+    def string(self, value: Optional[str]) -> Optional[int]:
+        if value is None:
+            return None
+        code = self._string_codes.get(value)
+        if code is None:
+            code = self._string_codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def activity(self, activity: dict) -> int:
+        code = self._activity_ids.get(id(activity))
+        if code is not None:
+            return code
+        key = json_backend.dumps(activity)
+        code = self._activity_codes.get(key)
+        if code is None:
+            code = self._activity_codes[key] = len(self.activities)
+            encoded = dict(activity)
+            encoded["type"] = _ACTIVITY_TYPE_CODES.get(activity.get("type"), activity.get("type"))
+            self.activities.append(encoded)
+        # the member records keep these dicts alive, so ids aren't reused
+        self._activity_ids[id(activity)] = code
+        return code
+
+    def columns(self, members: Iterable[MemberRecord], roles: Dict[int, dict]) -> Dict[str, list]:
+        columns: Dict[str, list] = {
+            field: [] for field in (
+                "id", *STRING_FIELDS, "banner_pending", "accent_color",
+                "badges", "status", "activities", "joined_at", "roles",
+            )
+        }
+        string = self.string
+        activity = self.activity
+        snowflake = str if self.string_ids else int
+        for member in members:
+            columns["id"].append(snowflake(member.id))
+            for field in STRING_FIELDS:
+                columns[field].append(string(getattr(member, field)))
+            columns["banner_pending"].append(member.banner_pending)
+            columns["accent_color"].append(member.accent_color)
+            columns["badges"].append([string(badge) for badge in member.badges])
+            columns["status"].append(member.status)
+            columns["activities"].append([activity(a) for a in member.activities])
+            columns["joined_at"].append(member.joined_at)
+            columns["roles"].append([snowflake(role["id"]) for role in member.sorted_roles(roles)])
+        return columns
+
+    def tables(self) -> dict:
+        return {
+            "statuses": list(STATUSES),
+            "activity_types": list(ACTIVITY_TYPES),
+            "strings": self.strings,
+            "activities": self.activities,
+        }
+
+
+def from_columnar(data: dict) -> dict:
+    """
+    Decode a columnar snapshot (with string or integer IDs) back into the
+    full /api/snapshot format.
+    """
+    strings = data["strings"]
+    statuses = data["statuses"]
+    activity_types = data["activity_types"]
+    activities = []
+    for activity in data["activities"]:
+        activity = dict(activity)
+        if isinstance(activity.get("type"), int):
+            activity["type"] = activity_types[activity["type"]]
+        activities.append(activity)
+
+    def text(code):
+        return None if code is None else strings[code]
+
+    guilds = []
+    for guild in data["guilds"]:
+        guild = dict(guild)
+        roles = guild.pop("roles")
+        columns = guild.pop("columns")
+        members = []
+        for i, member_id in enumerate(columns["id"]):
+            member = {"id": str(member_id)}
+            for field in STRING_FIELDS:
+                member[field] = text(columns[field][i])
+            member["banner_pending"] = columns["banner_pending"][i]
+            member["accent_color"] = columns["accent_color"][i]
+            member["badges"] = [strings[code] for code in columns["badges"][i]]
+            member["status"] = statuses[columns["status"][i]]
+            member["activities"] = [activities[code] for code in columns["activities"][i]]
+            member["joined_at"] = from_micros(columns["joined_at"][i])
+            member["roles"] = [roles[str(role_id)] for role_id in columns["roles"][i]]
+            members.append(member)
+        guild["members"] = members
+        guilds.append(guild)
+
+    snapshot = {key: data[key] for key in ("epoch", "version", "generated_at") if key in data}
+    snapshot["guilds"] = guilds
+    return snapshot
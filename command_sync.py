@@ -0,0 +1,70 @@
+# command_sync.py
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+
+from discord import app_commands
+from discord.ext import commands
+
+# Fingerprint of the last synced command tree, per application ID
+SYNC_STATE_PATH = os.getenv(
+    "COMMAND_SYNC_STATE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "command_sync.json")
+)
+
+
+def tree_fingerprint(tree: app_commands.CommandTree) -> str:
+    """
+    SHA-256 of the global command payload ``tree.sync()`` would upload
+    (names, descriptions, parameters, permissions...), independent of the
+    order commands were registered in.
+    """
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands()),
+        key=lambda command: (command.get("type", 1), command["name"]),
+    )
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _read_state(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _write_state(path: str, state: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+async def sync_commands(bot: commands.Bot, force: bool = False, path: Optional[str] = None) -> dict:
+    """
+    ``bot.tree.sync()``, but only when the tree's fingerprint differs from
+    the last successful sync (or ``force``). Returns what happened:
+    ``synced``, ``commands`` (count), ``seconds`` and ``fingerprint``.
+    """
+    path = path or SYNC_STATE_PATH
+    fingerprint = tree_fingerprint(bot.tree)
+    key = str(bot.application_id)
+    state = _read_state(path)
+
+    if not force and state.get(key, {}).get("fingerprint") == fingerprint:
+        return {"synced": False, "commands": len(bot.tree.get_commands()), "seconds": 0.0, "fingerprint": fingerprint}
+
+    start = time.perf_counter()
+    synced = await bot.tree.sync()
+    elapsed = time.perf_counter() - start
+
+    state[key] = {"fingerprint": fingerprint, "synced_at": time.time(), "commands": len(synced)}
+    try:
+        _write_state(path, state)
+    except OSError as e:
+        print(f"Failed to write {path}: {e}")
+    return {"synced": True, "commands": len(synced), "seconds": round(elapsed, 2), "fingerprint": fingerprint}
@@ -0,0 +1,197 @@
+# command_trace.py
+import contextvars
+import sys
+import time
+import traceback
+from typing import Dict, Optional
+
+import aiohttp
+import discord
+from discord import app_commands
+from discord.ext import commands
+from discord.webhook.async_ import AsyncWebhookAdapter
+
+import metrics
+from metrics import RingBuffer
+
+# samples kept per command and measure; percentiles cover the most recent ones
+TRACE_SAMPLES = 512
+# where a command's time goes: Discord's REST API, other HTTP APIs, our code
+MEASURES = ("wall", "discord", "http", "local")
+
+COMMAND_INVOCATIONS = metrics.Counter("command_invocations_total", "Command invocations by outcome.", ("command", "outcome"))
+COMMAND_SECONDS = metrics.Histogram("command_seconds", "Command latency, from invocation to completion or error.", ("command",))
+COMMAND_WAIT_SECONDS = metrics.Histogram(
+    "command_wait_seconds", "Time commands spent awaiting REST calls, by target.", ("command", "target")
+)
+
+
+class Trace:
+    __slots__ = ("started", "discord", "http", "done")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.discord = 0.0
+        self.http = 0.0
+        self.done = False
+
+
+# the trace of the command running in the current task; REST wrappers and
+# error / completion listeners (which inherit the task's context) find it here
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("command_trace", default=None)
+
+
+def _add_http(elapsed: float):
+    trace = _current.get()
+    if trace is not None and not trace.done:
+        trace.http += elapsed
+
+
+def _timed_discord(request):
+    """
+    Wrap a Discord REST ``request`` coroutine function so the time spent in
+    it counts as "discord" in the running command's trace.
+    """
+    async def traced_request(*args, **kwargs):
+        trace = _current.get()
+        if trace is None or trace.done:
+            return await request(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return await request(*args, **kwargs)
+        finally:
+            trace.discord += time.perf_counter() - start
+
+    traced_request.traced = True
+    return traced_request
+
+
+def http_trace_config() -> aiohttp.TraceConfig:
+    """
+    TraceConfig for aiohttp sessions that commands use to call external
+    APIs, so the time shows up as "http" in the command's trace.
+    """
+    async def on_request_start(session, context, params):
+        context.started = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        _add_http(time.perf_counter() - context.started)
+
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(on_request_start)
+    config.on_request_end.append(on_request_end)
+    config.on_request_exception.append(on_request_end)
+    return config
+
+
+class CommandStats:
+    __slots__ = ("samples", "errors")
+
+    def __init__(self, size: int):
+        self.samples = {measure: RingBuffer(size) for measure in MEASURES}
+        self.errors = 0
+
+    def report(self) -> dict:
+        return {
+            "count": self.samples["wall"].count,
+            "errors": self.errors,
+            **{f"{measure}_ms": {
+                name: round(value * 1000, 1) if value is not None else None
+                for name, value in buffer.percentiles().items()
+            } for measure, buffer in self.samples.items()},
+        }
+
+
+class CommandTracer:
+    """
+    Times every command invocation (prefix and slash, hybrid or app-only)
+    and splits it into time awaiting Discord's REST API, time awaiting
+    other HTTP APIs (sessions created with ``http_trace_config``) and the
+    rest, which is our own code. Each is kept per command in ring buffers.
+
+    REST calls awaited concurrently are each counted in full, so "local"
+    is clamped at zero for commands that gather requests.
+    """
+
+    def __init__(self, bot: commands.Bot, size: int = TRACE_SAMPLES):
+        self.bot = bot
+        self.size = size
+        self.commands: Dict[str, CommandStats] = {}
+
+    def install(self):
+        bot = self.bot
+        bot.http.request = _timed_discord(bot.http.request)
+        # interaction responses and followups (ctx.defer, ctx.send from a
+        # slash command, interaction.response.*) don't go through bot.http
+        # but through the webhook adapter, shared by every interaction
+        if not getattr(AsyncWebhookAdapter.request, "traced", False):
+            AsyncWebhookAdapter.request = _timed_discord(AsyncWebhookAdapter.request)
+        bot.before_invoke(self._before_invoke)
+        bot.after_invoke(self._after_invoke)
+        bot.add_listener(self._on_command_error, "on_command_error")
+        bot.add_listener(self._on_app_command_completion, "on_app_command_completion")
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        """
+        Begin a trace for the current task, unless one is already running
+        (slash invocations of hybrid commands start at the tree).
+        """
+        trace = _current.get()
+        if trace is None or trace.done:
+            _current.set(Trace())
+
+    def finish(self, name: str, failed: bool = False):
+        trace = _current.get()
+        if trace is None or trace.done:
+            return
+        trace.done = True
+        wall = time.perf_counter() - trace.started
+
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats(self.size)
+        samples = stats.samples
+        samples["wall"].add(wall)
+        samples["discord"].add(trace.discord)
+        samples["http"].add(trace.http)
+        samples["local"].add(max(0.0, wall - trace.discord - trace.http))
+        if failed:
+            stats.errors += 1
+
+        COMMAND_INVOCATIONS.inc(name, "error" if failed else "ok")
+        COMMAND_SECONDS.observe(wall, name)
+        COMMAND_WAIT_SECONDS.observe(trace.discord, name, "discord")
+        COMMAND_WAIT_SECONDS.observe(trace.http, name, "http")
+
+    async def _before_invoke(self, ctx: commands.Context):
+        self.start()
+
+    async def _after_invoke(self, ctx: commands.Context):
+        # prefix commands get here on errors too; slash ones only on success
+        self.finish(ctx.command.qualified_name, ctx.command_failed)
+
+    async def _on_command_error(self, ctx: commands.Context, error: commands.CommandError):
+        if ctx.command is not None:
+            self.finish(ctx.command.qualified_name, failed=True)
+        # any on_command_error listener switches off discord.py's default
+        # error report, so print it here unless the command handles its errors
+        if (ctx.command and ctx.command.has_error_handler()) or (ctx.cog and ctx.cog.has_error_handler()):
+            return
+        print(f"Ignoring exception in command {ctx.command}:", file=sys.stderr)
+        traceback.print_exception(type(error), error, error.__traceback__, file=sys.stderr)
+
+    async def _on_app_command_completion(self, interaction: discord.Interaction, command: app_commands.Command):
+        # no-op for hybrid commands, which after_invoke already finished
+        self.finish(command.qualified_name)
+
+    # ---------- report ----------
+
+    def report(self) -> dict:
+        """
+        Per-command count, errors and p50/p95/p99 of each measure in ms,
+        slowest (by p95 wall time) first.
+        """
+        reports = {name: stats.report() for name, stats in self.commands.items()}
+        return dict(sorted(reports.items(), key=lambda item: -(item[1]["wall_ms"]["p95"] or 0)))
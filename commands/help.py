@@ -38,6 +38,11 @@ class Help(commands.Cog):
     @commands.hybrid_command(name="help", description="Shows this help message.")
     async def help(self, ctx: commands.Context, *, command_name: str = None):
         """Shows detailed help for a command or a paginated list of all commands."""
+        # cogs loaded on first use (COGS_LAZY) have to be loaded to be listed
+        loader = getattr(self.bot, "cog_loader", None)
+        if loader is not None:
+            await loader.load_deferred()
+
         if command_name:
             command = self.bot.get_command(command_name)
             if not command or command.hidden:
@@ -0,0 +1,96 @@
+# commands/owner.py
+import asyncio
+import io
+from collections import Counter
+
+import discord
+from discord.ext import commands
+
+from command_sync import sync_commands
+from loop_monitor import collapse, sample_stacks
+
+# longest /profile run, in seconds
+PROFILE_MAX_SECONDS = 60
+
+class Owner(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.hybrid_command(name="sync", description="Re-syncs the bot's slash commands with Discord.", hidden=True)
+    @commands.is_owner()
+    async def sync(self, ctx: commands.Context):
+        """Re-syncs the bot's slash commands with Discord, even if nothing changed."""
+        await ctx.defer(ephemeral=True)
+
+        # deferred cogs' commands have to be in the tree, or syncing drops them
+        loader = getattr(self.bot, "cog_loader", None)
+        if loader is not None:
+            await loader.load_deferred()
+
+        try:
+            result = await sync_commands(self.bot, force=True)
+        except discord.HTTPException as e:
+            await ctx.send(f"Sync failed: {e}", ephemeral=True)
+            return
+
+        embed = discord.Embed(title="Commands Synced", color=discord.Color.green())
+        embed.add_field(name="Commands", value=result["commands"], inline=True)
+        embed.add_field(name="Took", value=f"{result['seconds']} s", inline=True)
+        embed.set_footer(text=f"Fingerprint {result['fingerprint'][:12]}")
+        await ctx.send(embed=embed, ephemeral=True)
+
+    @commands.hybrid_command(name="stats", description="Shows per-command latency percentiles.", hidden=True)
+    @commands.is_owner()
+    async def stats(self, ctx: commands.Context):
+        """Shows p50/p95/p99 latency per command, and where the time went."""
+        tracer = getattr(self.bot, "command_tracer", None)
+        report = tracer.report() if tracer is not None else {}
+        if not report:
+            await ctx.send("No commands traced yet.", ephemeral=True)
+            return
+
+        def ms(value):
+            return "-" if value is None else f"{value:g}"
+
+        embed = discord.Embed(title="Command Latency", color=discord.Color.blue())
+        # slowest first; embeds hold at most 25 fields
+        for name, stats in list(report.items())[:25]:
+            wall = stats["wall_ms"]
+            p95 = {measure: stats[f"{measure}_ms"]["p95"] for measure in ("discord", "http", "local")}
+            embed.add_field(
+                name=f"{name} ({stats['count']} runs, {stats['errors']} errors)",
+                value=(
+                    f"p50 {ms(wall['p50'])} / p95 {ms(wall['p95'])} / p99 {ms(wall['p99'])} ms\n"
+                    f"p95 Discord {ms(p95['discord'])} · HTTP {ms(p95['http'])} · local {ms(p95['local'])} ms"
+                ),
+                inline=False,
+            )
+        embed.set_footer(text=f"Last {tracer.size} runs per command")
+        await ctx.send(embed=embed, ephemeral=True)
+
+    @commands.hybrid_command(name="profile", description="Samples the bot's stacks and uploads a flamegraph dump.", hidden=True)
+    @commands.is_owner()
+    async def profile(self, ctx: commands.Context, seconds: int = 10):
+        """Samples every thread's stack for a while and uploads them as collapsed stacks (flamegraph.pl / speedscope)."""
+        seconds = min(max(seconds, 1), PROFILE_MAX_SECONDS)
+        await ctx.defer(ephemeral=True)
+
+        counts = await asyncio.to_thread(sample_stacks, seconds)
+        total = sum(counts.values())
+        # innermost function of each sample, i.e. where the time went
+        leaves = Counter()
+        for stack, count in counts.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+
+        embed = discord.Embed(title="Profile", color=discord.Color.blue())
+        embed.add_field(name="Duration", value=f"{seconds} s", inline=True)
+        embed.add_field(name="Samples", value=total, inline=True)
+        top = "\n".join(f"`{name}` {count * 100 / total:.1f}%" for name, count in leaves.most_common(8))
+        embed.add_field(name="Top functions", value=top or "No samples.", inline=False)
+        embed.set_footer(text="Samples include idle threads waiting in select / sleep")
+        file = discord.File(io.BytesIO(collapse(counts).encode()), filename="profile.collapsed")
+        await ctx.send(embed=embed, file=file, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(Owner(bot))
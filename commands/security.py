@@ -4,6 +4,8 @@ from discord.ext import commands
 import aiohttp
 import re
 
+from command_trace import http_trace_config
+
 class Security(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
@@ -18,7 +20,7 @@ class Security(commands.Cog):
 
         # IP Lookup using ip-api.com
         url = f"http://ip-api.com/json/{ip_address}"
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=[http_trace_config()]) as session:
             async with session.get(url) as response:
                 if response.status != 200:
                     await ctx.send("Failed to look up IP address.", ephemeral=True)
@@ -6,6 +6,8 @@ import aiohttp
 import re
 import math
 
+from command_trace import http_trace_config
+
 # Safe-ish calculator
 # A better solution is a dedicated library like 'asteval' or 'simpleeval'
 # but this avoids adding new dependencies.
@@ -77,7 +79,7 @@ class Tools(commands.Cog):
     async def shorten(self, ctx: commands.Context, url: str):
         """Shortens a URL using TinyURL."""
         api_url = f"http://tinyurl.com/api-create.php?url={url}"
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=[http_trace_config()]) as session:
             async with session.get(api_url) as response:
                 if response.status == 200:
                     short_url = await response.text()
@@ -7,7 +7,8 @@ import time
 class Utility(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.start_time = time.time()
+        # the process start, not when this cog happened to be loaded
+        self.start_time = getattr(bot, "started_at", None) or time.time()
 
     @commands.hybrid_command(name="ping", description="Shows the bot's latency.")
     async def ping(self, ctx: commands.Context):
@@ -59,9 +60,10 @@ class Utility(commands.Cog):
             badges = [flag.name.replace('_', ' ').title() for flag in member.public_flags.all()]
             embed.add_field(name="Badges", value=", ".join(badges), inline=False)
 
-        user = await self.bot.fetch_user(member.id)
-        if user.banner:
-            embed.set_image(url=user.banner.url)
+        # shared profile cache, only hits the API on a miss
+        profile = await self.bot.banner_resolver.resolve(member.id)
+        if profile.banner_url:
+            embed.set_image(url=profile.banner_url)
 
         await ctx.send(embed=embed)
 
@@ -108,15 +110,16 @@ class Utility(commands.Cog):
         """Shows a user's banner."""
         user = user or ctx.author
         
-        user = await self.bot.fetch_user(user.id)
+        profile = await self.bot.banner_resolver.resolve(user.id)
+        accent_color = discord.Color(profile.accent_color) if profile.accent_color is not None else None
 
-        if user.banner:
-            embed = discord.Embed(title=f"{user.name}'s Banner", color=user.accent_color or discord.Color.blue())
-            embed.set_image(url=user.banner.url)
+        if profile.banner_url:
+            embed = discord.Embed(title=f"{user.name}'s Banner", color=accent_color or discord.Color.blue())
+            embed.set_image(url=profile.banner_url)
             await ctx.send(embed=embed)
         else:
-            if user.accent_color:
-                embed = discord.Embed(title=f"{user.name}'s Banner", description=f"This user doesn't have a banner, but they have an accent color: `{user.accent_color}`", color=user.accent_color)
+            if accent_color:
+                embed = discord.Embed(title=f"{user.name}'s Banner", description=f"This user doesn't have a banner, but they have an accent color: `{accent_color}`", color=accent_color)
                 await ctx.send(embed=embed)
             else:
                 await ctx.send(f"{user.name} doesn't have a banner or accent color.")
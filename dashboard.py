@@ -549,6 +549,14 @@ TEMPLATE = r"""
             opacity: 0.9;
         }
 
+        .modal-banner-pending {
+            position: absolute;
+            top: 10px;
+            right: 12px;
+            font-size: 11px;
+            color: var(--text-muted);
+        }
+
         .modal-avatar {
             position: absolute;
             bottom: -28px;
@@ -685,7 +693,7 @@ TEMPLATE = r"""
     <div class="left">
         <h1>
             Discord Live Dashboard
-            <span class="pill">live · auto refresh</span>
+            <span class="pill">live · push updates</span>
         </h1>
         <p>Shows all members grouped by guild. Click any user for full profile.</p>
     </div>
@@ -724,7 +732,7 @@ TEMPLATE = r"""
             </div>
             <div class="main-header-right">
                 <div class="refresh-indicator">
-                    Refreshes every 7s · <span id="refreshStatus">idle</span>
+                    Live updates · <span id="refreshStatus">idle</span>
                 </div>
                 <div class="sort-control">
                     Sort by
@@ -802,6 +810,10 @@ TEMPLATE = r"""
 
 <script>
 const API_URL = "http://127.0.0.1:5005/api/snapshot";
+const DELTA_URL = API_URL + "/delta";
+const STREAM_URL = "http://127.0.0.1:5005/api/stream";
+// Full snapshots are fetched in the compact normalized format
+const SNAPSHOT_FORMAT = "normalized";
 const REFRESH_MS = 7000;
 
 let snapshot = null;
@@ -916,13 +928,83 @@ function roleHexColor(role) {
     return "#" + hex;
 }
 
+function memberSortName(m) {
+    return (m.display_name || m.name || "").toLowerCase();
+}
+
+// Expand a ?format=normalized snapshot into the full format: member rows
+// point into the global users table and the guild's roles table
+function denormalize(data) {
+    if (data.format !== "normalized") return data;
+    const users = data.users || {};
+    const guilds = (data.guilds || []).map(guild => {
+        const { roles, members, ...header } = guild;
+        header.members = (members || []).map(row => {
+            const { user, roles: roleIds, avatar_url, ...fields } = row;
+            return {
+                id: user,
+                ...users[user],
+                ...fields,
+                avatar_url: avatar_url !== undefined ? avatar_url : users[user]?.avatar_url,
+                roles: (roleIds || []).map(id => roles[id]).filter(Boolean),
+            };
+        });
+        return header;
+    });
+    const { users: _users, format: _format, ...rest } = data;
+    return { ...rest, guilds };
+}
+
+// Patch the local snapshot with a /api/snapshot/delta response
+function applyDelta(delta) {
+    const guildsById = new Map(snapshot.guilds.map(g => [g.id, g]));
+    (delta.removed_guilds || []).forEach(id => guildsById.delete(id));
+
+    (delta.guilds || []).forEach(entry => {
+        const { upserted, removed, replaced, ...header } = entry;
+        const existing = guildsById.get(entry.id);
+        if (replaced || !existing) {
+            header.members = header.members || upserted || [];
+            guildsById.set(entry.id, header);
+            return;
+        }
+
+        const members = new Map(existing.members.map(m => [m.id, m]));
+        (removed || []).forEach(id => members.delete(id));
+        (upserted || []).forEach(m => members.set(m.id, m));
+        header.members = Array.from(members.values())
+            .sort((a, b) => memberSortName(a).localeCompare(memberSortName(b)));
+        guildsById.set(entry.id, header);
+    });
+
+    snapshot = {
+        epoch: delta.epoch,
+        version: delta.version,
+        generated_at: delta.generated_at,
+        guilds: Array.from(guildsById.values())
+            .sort((a, b) => a.name.toLowerCase().localeCompare(b.name.toLowerCase())),
+    };
+}
+
 async function fetchSnapshot() {
     refreshStatusEl.textContent = "fetching...";
     try {
-        const res = await fetch(API_URL);
+        // Full snapshot once, then only what changed since our version
+        const url = snapshot
+            ? `${DELTA_URL}?since=${snapshot.version}&epoch=${snapshot.epoch}`
+            : `${API_URL}?format=${SNAPSHOT_FORMAT}`;
+        const res = await fetch(url);
         if (!res.ok) throw new Error("HTTP " + res.status);
-        snapshot = await res.json();
+        const data = await res.json();
         refreshStatusEl.textContent = "ok";
+
+        if (!snapshot || data.full !== false) {
+            snapshot = denormalize(data);
+        } else if (data.version !== snapshot.version) {
+            applyDelta(data);
+        } else {
+            return; // nothing changed
+        }
         renderSnapshot();
     } catch (e) {
         console.error("Failed to fetch snapshot:", e);
@@ -1196,6 +1278,11 @@ function openModal(guild, member) {
         const img = document.createElement("img");
         img.src = member.banner_url;
         modalBannerEl.appendChild(img);
+    } else if (member.banner_pending) {
+        const pending = document.createElement("div");
+        pending.className = "modal-banner-pending";
+        pending.textContent = "banner pending";
+        modalBannerEl.appendChild(pending);
     }
 
     modalAvatarEl.innerHTML = "";
@@ -1292,9 +1379,42 @@ sortModeEl.addEventListener("change", (e) => {
     renderSnapshot();
 });
 
-// Start auto-refresh
-fetchSnapshot();
-refreshTimer = setInterval(fetchSnapshot, REFRESH_MS);
+// Coalesce bursts of stream events into one render per frame
+let renderPending = false;
+function scheduleRender() {
+    if (renderPending) return;
+    renderPending = true;
+    requestAnimationFrame(() => {
+        renderPending = false;
+        renderSnapshot();
+    });
+}
+
+// Live updates over Server-Sent Events; the browser resumes with
+// Last-Event-ID after a reconnect, so we only get what we missed.
+function startStream() {
+    if (!window.EventSource) {
+        // Fall back to delta polling
+        fetchSnapshot();
+        refreshTimer = setInterval(fetchSnapshot, REFRESH_MS);
+        return;
+    }
+
+    const source = new EventSource(`${STREAM_URL}?format=${SNAPSHOT_FORMAT}`);
+    source.addEventListener("snapshot", (e) => {
+        snapshot = denormalize(JSON.parse(e.data));
+        scheduleRender();
+    });
+    source.addEventListener("delta", (e) => {
+        if (!snapshot) return;
+        applyDelta(JSON.parse(e.data));
+        scheduleRender();
+    });
+    source.onopen = () => { refreshStatusEl.textContent = "live"; };
+    source.onerror = () => { refreshStatusEl.textContent = "reconnecting..."; };
+}
+
+startStream();
 </script>
 </body>
 </html>
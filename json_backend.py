@@ -0,0 +1,41 @@
+# json_backend.py
+"""
+JSON encoding for the API, using the fastest installed library.
+
+orjson or msgspec are used when installed (SNAPSHOT_JSON_BACKEND=orjson|msgspec|json
+picks one explicitly), falling back to the standard library.
+"""
+import json
+import os
+from typing import Any, Callable, Dict
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _load_backends() -> Dict[str, Callable[[Any], bytes]]:
+    backends = {}
+    try:
+        import orjson
+        backends["orjson"] = orjson.dumps
+    except ImportError:
+        pass
+    try:
+        import msgspec
+        backends["msgspec"] = msgspec.json.Encoder().encode
+    except ImportError:
+        pass
+    backends["json"] = _stdlib_dumps
+    return backends
+
+
+# every available backend, fastest first
+BACKENDS = _load_backends()
+
+BACKEND = os.getenv("SNAPSHOT_JSON_BACKEND") or next(iter(BACKENDS))
+if BACKEND not in BACKENDS:
+    print(f"⚠️ JSON backend {BACKEND!r} is not installed, using {next(iter(BACKENDS))!r}")
+    BACKEND = next(iter(BACKENDS))
+
+dumps: Callable[[Any], bytes] = BACKENDS[BACKEND]
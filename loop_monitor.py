@@ -0,0 +1,247 @@
+# loop_monitor.py
+import asyncio
+import sys
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import metrics
+from metrics import RingBuffer
+
+# Default longest stretch of synchronous work between yields, in seconds
+MAX_SLICE = 0.01
+# How often LoopLagProbe checks in, in seconds
+LAG_INTERVAL = 0.01
+# LoopWatchdog: how often it checks in, and how late counts as a stall
+WATCHDOG_INTERVAL = 0.1
+STALL_THRESHOLD = 0.2
+# seconds between stack samples taken by sample_stacks
+PROFILE_INTERVAL = 0.005
+
+LOOP_LAG_SECONDS = metrics.Histogram("event_loop_lag_seconds", "How late the watchdog task woke up.")
+LOOP_STALLS = metrics.Counter("event_loop_stalls_total", "Times the event loop was blocked past the stall threshold.")
+
+
+class TimeSlicer:
+    """
+    Splits a long synchronous loop into slices of at most ``max_slice``
+    seconds: call ``await slicer.tick()`` once per item and it yields to the
+    event loop whenever the current slice has run out, so gateway heartbeats
+    and API requests get a turn in between.
+
+    Several coroutines can share one slicer: they then take turns, with at
+    most one slice run per loop iteration between all of them.
+
+    A coroutine woken by a timer needs a couple of loop iterations to run,
+    so expect loop lag of two to three slices while a slicer is busy.
+    """
+
+    def __init__(self, max_slice: float = MAX_SLICE):
+        self.max_slice = max_slice
+        self.slices = 1
+        self._deadline = time.perf_counter() + max_slice
+        # a slice was started in the current loop iteration
+        self._taken = False
+
+    def _release(self):
+        self._taken = False
+
+    async def tick(self):
+        if time.perf_counter() < self._deadline:
+            return
+        await asyncio.sleep(0)
+        while self._taken:
+            await asyncio.sleep(0)
+        self._taken = True
+        # runs at the start of the next iteration, before anything resumed there
+        asyncio.get_running_loop().call_soon(self._release)
+        self.slices += 1
+        self._deadline = time.perf_counter() + self.max_slice
+
+
+class LoopLagProbe:
+    """
+    Measures event loop lag while it runs: a task that sleeps ``interval``
+    seconds at a time and records how much later than asked it woke up.
+    """
+
+    def __init__(self, interval: float = LAG_INTERVAL):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+        # loop time the current sleep started at
+        self._sleeping_since: Optional[float] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._sleeping_since = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(loop.time() - self._sleeping_since - self.interval, 0.0))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def stop(self) -> dict:
+        if self._task is not None:
+            # the sleep in flight may already be overdue, e.g. when the work
+            # being measured ends with one long blocking call; count it
+            if self._sleeping_since is not None:
+                overdue = asyncio.get_running_loop().time() - self._sleeping_since - self.interval
+                if overdue > 0:
+                    self.samples.append(overdue)
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        return self.stats()
+
+    def stats(self) -> dict:
+        samples = sorted(self.samples)
+        if not samples:
+            return {"samples": 0, "max_ms": None, "mean_ms": None, "p99_ms": None}
+        return {
+            "samples": len(samples),
+            "max_ms": round(samples[-1] * 1000, 2),
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 2),
+            "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 2),
+        }
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def frame_stack(frame) -> List[str]:
+    """
+    ``module.function:line`` for each frame from ``frame`` out to the
+    thread's entry point, outermost first.
+    """
+    stack = []
+    while frame is not None:
+        stack.append(f"{frame_name(frame)}:{frame.f_lineno}")
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class LoopWatchdog:
+    """
+    Always-on loop lag monitor. A task wakes every ``interval`` seconds and
+    records how late it was; a daemon thread watches that task and, when
+    the loop hasn't come back for ``threshold`` seconds, captures the loop
+    thread's stack, i.e. whatever callback is blocking it. The last
+    ``max_stalls`` stalls are kept in ``stalls``.
+
+    The thread needs the GIL to take the stack, so a stall inside a C call
+    that never releases it (a huge ``int ** int``, say) is still recorded
+    but without a stack.
+    """
+
+    def __init__(self, threshold: float = STALL_THRESHOLD, interval: float = WATCHDOG_INTERVAL, max_stalls: int = 20):
+        self.threshold = threshold
+        self.interval = interval
+        self.lag = RingBuffer()
+        self.stalls: Deque[dict] = deque(maxlen=max_stalls)
+        self.stall_count = 0
+
+        self._ticks = 0
+        self._last_tick = time.monotonic()
+        # (tick it was taken in, stall record) set by the watcher thread
+        self._captured: Optional[Tuple[int, dict]] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+        self._stop.clear()
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - start - self.interval, 0.0)
+            self._last_tick = time.monotonic()
+            captured, self._captured = self._captured, None
+            ticks, self._ticks = self._ticks, self._ticks + 1
+
+            self.lag.add(lag)
+            LOOP_LAG_SECONDS.observe(lag)
+            if lag >= self.threshold:
+                stall = captured[1] if captured is not None and captured[0] == ticks else {"at": time.time(), "stack": None}
+                stall["blocked_ms"] = round(lag * 1000, 1)
+                self.stalls.append(stall)
+                self.stall_count += 1
+                LOOP_STALLS.inc()
+                where = " <- ".join(reversed(stall["stack"][-4:])) if stall["stack"] else "stack not captured"
+                print(f"⚠️ Event loop blocked for {stall['blocked_ms']} ms: {where}")
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            ticks = self._ticks
+            if self._captured is not None or time.monotonic() - self._last_tick < self.interval + self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                self._captured = (ticks, {"at": time.time(), "stack": frame_stack(frame)})
+
+    def report(self) -> dict:
+        lag = self.lag.percentiles()
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "lag_ms": {name: round(value * 1000, 2) if value is not None else None for name, value in lag.items()},
+            "stalls": self.stall_count,
+            "recent_stalls": list(self.stalls),
+        }
+
+
+def sample_stacks(duration: float, interval: float = PROFILE_INTERVAL) -> Dict[str, int]:
+    """
+    Sampling profiler: every ``interval`` seconds for ``duration`` seconds,
+    take the stack of every other thread. Returns collapsed stacks
+    (``thread;outer;...;inner``) and how often each was seen. Blocking,
+    so run it in a worker thread.
+    """
+    me = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    counts: Dict[str, int] = {}
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            names_on_stack = []
+            while frame is not None:
+                names_on_stack.append(frame_name(frame))
+                frame = frame.f_back
+            names_on_stack.append(names.get(ident) or str(ident))
+            key = ";".join(reversed(names_on_stack))
+            counts[key] = counts.get(key, 0) + 1
+        time.sleep(interval)
+    return counts
+
+
+def collapse(counts: Dict[str, int]) -> str:
+    """
+    ``sample_stacks`` output in the collapsed-stack format flamegraph.pl,
+    speedscope and inferno read: one ``stack count`` line per stack.
+    """
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(counts.items(), key=lambda item: -item[1]))
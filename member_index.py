@@ -0,0 +1,253 @@
+# member_index.py
+import bisect
+import heapq
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from member_record import STATUS_CODES, MemberRecord
+
+SORTS = ("name", "status", "role")
+
+# Queries shorter than this can't use the trigram index and are answered
+# by scanning the requested order (stopping as soon as the page is full).
+GRAM = 3
+
+# GuildIndex.build sorts keys in runs of this many, then merges the runs
+# one key at a time, so no single sort holds the event loop for long
+SORT_RUN = 2048
+
+
+def name_key(member: MemberRecord) -> str:
+    return (member.display_name or member.name or "").lower()
+
+
+def search_text(member: MemberRecord) -> str:
+    # display name and username, which is what the dashboard searches
+    return f"{(member.display_name or '').lower()}\x00{(member.name or '').lower()}"
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    return frozenset(text[i:i + GRAM] for i in range(len(text) - GRAM + 1))
+
+
+def top_role_position(member: MemberRecord, roles: Dict[int, dict]) -> int:
+    return max((roles[role_id]["position"] for role_id in member.role_ids if role_id in roles), default=-1)
+
+
+async def sorted_in_slices(keys: List[Tuple], tick: Callable[[], Awaitable[None]]) -> List[Tuple]:
+    """
+    sorted(keys), awaiting ``tick()`` after every run of SORT_RUN keys and
+    every merged key.
+    """
+    runs = []
+    for i in range(0, len(keys), SORT_RUN):
+        runs.append(sorted(keys[i:i + SORT_RUN]))
+        await tick()
+    if len(runs) <= 1:
+        return runs[0] if runs else []
+    merged = []
+    for key in heapq.merge(*runs):
+        merged.append(key)
+        await tick()
+    return merged
+
+
+class _Entry:
+    __slots__ = ("keys", "status", "role_ids", "text", "grams")
+
+    def __init__(self, member_id: int, member: MemberRecord, roles: Dict[int, dict]):
+        name = name_key(member)
+        # status codes are already in dashboard order (online, idle, dnd, offline)
+        self.keys = {
+            "name": (name, member_id),
+            "status": (member.status, name, member_id),
+            "role": (-top_role_position(member, roles), name, member_id),
+        }
+        self.status = member.status
+        self.role_ids = frozenset(member.role_ids)
+        self.text = search_text(member)
+        self.grams = trigrams(self.text)
+
+
+class GuildIndex:
+    """
+    Pre-sorted member orders plus lookup sets for one guild, patched per
+    member so queries never sort or filter the whole guild.
+
+    - ``orders``: member sort keys for each of SORTS, kept sorted with bisect
+    - ``by_status`` / ``by_role``: member IDs per status and per role ID
+    - ``by_gram``: member IDs per trigram of display name + username
+    """
+
+    def __init__(self, members: Dict[int, MemberRecord], roles: Dict[int, dict]):
+        self.entries: Dict[int, _Entry] = {}
+        self.orders: Dict[str, List[Tuple]] = {sort: [] for sort in SORTS}
+        self.by_status: Dict[int, Set[int]] = defaultdict(set)
+        self.by_role: Dict[int, Set[int]] = defaultdict(set)
+        self.by_gram: Dict[str, Set[int]] = defaultdict(set)
+
+        for member_id, member in members.items():
+            entry = self.entries[member_id] = _Entry(member_id, member, roles)
+            for sort in SORTS:
+                self.orders[sort].append(entry.keys[sort])
+            self._link(member_id, entry)
+        for order in self.orders.values():
+            order.sort()
+
+    @classmethod
+    async def build(
+        cls,
+        members: Dict[int, MemberRecord],
+        roles: Dict[int, dict],
+        tick: Callable[[], Awaitable[None]],
+    ) -> "GuildIndex":
+        """
+        Same as the constructor, but awaits ``tick()`` (e.g. TimeSlicer.tick)
+        between members and while sorting, so indexing a big guild yields
+        to the event loop like serializing it does.
+        """
+        index = cls({}, roles)
+        for member_id, member in members.items():
+            entry = index.entries[member_id] = _Entry(member_id, member, roles)
+            for sort in SORTS:
+                index.orders[sort].append(entry.keys[sort])
+            index._link(member_id, entry)
+            await tick()
+        for sort in SORTS:
+            index.orders[sort] = await sorted_in_slices(index.orders[sort], tick)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    # ---------- maintenance ----------
+
+    def _link(self, member_id: int, entry: _Entry):
+        self.by_status[entry.status].add(member_id)
+        for role_id in entry.role_ids:
+            self.by_role[role_id].add(member_id)
+        for gram in entry.grams:
+            self.by_gram[gram].add(member_id)
+
+    def _unlink(self, member_id: int, entry: _Entry, keep: Optional[_Entry] = None):
+        if keep is None or keep.status != entry.status:
+            self.by_status[entry.status].discard(member_id)
+        for role_id in entry.role_ids - (keep.role_ids if keep else frozenset()):
+            self.by_role[role_id].discard(member_id)
+        for gram in entry.grams - (keep.grams if keep else frozenset()):
+            ids = self.by_gram[gram]
+            ids.discard(member_id)
+            if not ids:
+                del self.by_gram[gram]
+
+    def upsert(self, member_id: int, member: MemberRecord, roles: Dict[int, dict]):
+        old = self.entries.get(member_id)
+        new = self.entries[member_id] = _Entry(member_id, member, roles)
+        for sort in SORTS:
+            order = self.orders[sort]
+            if old is not None:
+                if old.keys[sort] == new.keys[sort]:
+                    continue
+                del order[bisect.bisect_left(order, old.keys[sort])]
+            bisect.insort(order, new.keys[sort])
+        if old is not None:
+            self._unlink(member_id, old, keep=new)
+        self._link(member_id, new)
+
+    def remove(self, member_id: int):
+        old = self.entries.pop(member_id, None)
+        if old is None:
+            return
+        for sort in SORTS:
+            order = self.orders[sort]
+            del order[bisect.bisect_left(order, old.keys[sort])]
+        self._unlink(member_id, old)
+
+    # ---------- queries ----------
+
+    def member_ids(self, sort: str = "name") -> Iterable[int]:
+        return (key[-1] for key in self.orders[sort])
+
+    def query(
+        self,
+        q: str = "",
+        statuses: Iterable[str] = (),
+        role_id: Optional[int] = None,
+        sort: str = "name",
+        after: Optional[Tuple] = None,
+        limit: int = 100,
+    ) -> Tuple[List[int], Optional[Tuple]]:
+        """
+        Member IDs matching all filters, in ``sort`` order, starting after
+        the sort key ``after``. Returns the IDs and the key to continue from
+        (None when there are no more matches).
+
+        Selective filters are answered from the lookup sets (sorting only
+        the candidates); broad ones walk the pre-sorted order and stop as
+        soon as the page is full.
+        """
+        q = q.lower()
+        # unknown status names simply match nobody
+        statuses = {STATUS_CODES.get(status, -1) for status in statuses}
+
+        # candidate sets from the indexes, smallest first
+        candidate_sets = []
+        if len(statuses) == 1:
+            candidate_sets.append(self.by_status.get(next(iter(statuses)), set()))
+        elif statuses:
+            candidate_sets.append(set().union(*(self.by_status.get(s, ()) for s in statuses)))
+        if role_id is not None:
+            candidate_sets.append(self.by_role.get(role_id, set()))
+        if len(q) >= GRAM:
+            grams = trigrams(q)
+            candidate_sets.extend(self.by_gram.get(gram, set()) for gram in grams)
+        candidate_sets.sort(key=len)
+
+        order = self.orders[sort]
+        entries = self.entries
+
+        def matches(member_id: int) -> bool:
+            # trigrams only narrow things down; the substring check is exact
+            return not q or q in entries[member_id].text
+
+        # sorting c candidates costs ~c log c, walking the order ~limit * n / c
+        if candidate_sets and len(candidate_sets[0]) ** 2 <= limit * len(order):
+            candidates = set(candidate_sets[0])
+            for ids in candidate_sets[1:]:
+                candidates &= ids
+                if not candidates:
+                    break
+            keys = sorted(entries[member_id].keys[sort] for member_id in candidates if matches(member_id))
+            start = bisect.bisect_right(keys, after) if after is not None else 0
+            page = keys[start:start + limit]
+            more = start + limit < len(keys)
+        else:
+            start = bisect.bisect_right(order, after) if after is not None else 0
+            stop = len(order)
+            if sort == "status" and len(statuses) == 1:
+                # matching members form one contiguous run in status order
+                status = next(iter(statuses))
+                start = max(start, bisect.bisect_left(order, (status,)))
+                stop = bisect.bisect_left(order, (status + 1,))
+            page = []
+            more = False
+            for i in range(start, stop):
+                key = order[i]
+                member_id = key[-1]
+                if all(member_id in ids for ids in candidate_sets) and matches(member_id):
+                    if len(page) == limit:
+                        more = True
+                        break
+                    page.append(key)
+
+        next_key = page[-1] if page and more else None
+        return [key[-1] for key in page], next_key
+
+    @staticmethod
+    def valid_key(sort: str, key: Tuple) -> bool:
+        """
+        Whether ``key`` (e.g. from a decoded cursor) has the shape of a
+        sort key for ``sort``.
+        """
+        shape = (str, int) if sort == "name" else (int, str, int)
+        return len(key) == len(shape) and all(type(part) is kind for part, kind in zip(key, shape))
@@ -0,0 +1,210 @@
+# member_record.py
+import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Status codes; the order is also the dashboard's "sort by status" order.
+# Anything else (e.g. "invisible") is stored as offline, which is how
+# other users see it anyway.
+STATUSES = ("online", "idle", "dnd", "offline")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+OFFLINE = STATUS_CODES["offline"]
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+# Role-ID and badge tuples repeat across thousands of members; keep one copy
+# of each distinct tuple. Combinations come and go with role changes and
+# departed guilds, so once the table holds INTERN_LIMIT tuples it starts
+# over: records keep the tuples they have, new ones share less for a while.
+INTERN_LIMIT = 65536
+_interned: Dict[tuple, tuple] = {}
+
+
+def intern_tuple(values: tuple) -> tuple:
+    interned = _interned.get(values)
+    if interned is None:
+        if len(_interned) >= INTERN_LIMIT:
+            _interned.clear()
+        interned = _interned[values] = values
+    return interned
+
+
+def status_code(status: str) -> int:
+    return STATUS_CODES.get(status, OFFLINE)
+
+
+def to_micros(value: Optional[datetime.datetime]) -> Optional[int]:
+    """
+    Aware datetime -> integer microseconds since the epoch (exact).
+    """
+    if value is None:
+        return None
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def from_micros(value: Optional[int]) -> Optional[str]:
+    """
+    Inverse of to_micros, formatted like datetime.isoformat() on the original.
+    """
+    if value is None:
+        return None
+    return (_EPOCH + datetime.timedelta(microseconds=value)).isoformat()
+
+
+class MemberRecord:
+    """
+    Compact in-memory form of one snapshot member.
+
+    IDs and the join date are ints, status is a code from STATUSES, and
+    roles are an interned tuple of role IDs resolved against the guild's
+    role table. The wire dict is only built by ``to_dict`` at the API edge.
+    """
+
+    __slots__ = (
+        "id", "name", "discriminator", "global_name", "display_name", "nick",
+        "avatar_url", "banner_url", "banner_pending", "accent_color",
+        "badges", "status", "activities", "joined_at", "role_ids",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        discriminator: str,
+        global_name: Optional[str],
+        display_name: str,
+        nick: Optional[str],
+        avatar_url: Optional[str],
+        banner_url: Optional[str],
+        banner_pending: bool,
+        accent_color: Optional[int],
+        badges: Tuple[str, ...],
+        status: int,
+        activities: Tuple[dict, ...],
+        joined_at: Optional[int],
+        role_ids: Tuple[int, ...],
+    ):
+        self.id = id
+        self.name = name
+        self.discriminator = discriminator
+        self.global_name = global_name
+        self.display_name = display_name
+        self.nick = nick
+        self.avatar_url = avatar_url
+        self.banner_url = banner_url
+        self.banner_pending = banner_pending
+        self.accent_color = accent_color
+        self.badges = intern_tuple(badges)
+        self.status = status
+        self.activities = activities
+        self.joined_at = joined_at
+        self.role_ids = intern_tuple(role_ids)
+
+    def _values(self) -> tuple:
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, MemberRecord):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __repr__(self) -> str:
+        return f"<MemberRecord id={self.id} name={self.name!r}>"
+
+    def replace(self, **fields) -> "MemberRecord":
+        values = {slot: getattr(self, slot) for slot in self.__slots__}
+        values.update(fields)
+        return MemberRecord(**values)
+
+    def sorted_roles(self, roles: Dict[int, dict]) -> List[dict]:
+        """
+        This member's role dicts from the guild's role table, highest
+        first; roles missing from the table are skipped.
+        """
+        member_roles = [roles[role_id] for role_id in self.role_ids if role_id in roles]
+        member_roles.sort(key=lambda r: r["position"], reverse=True)
+        return member_roles
+
+    def to_dict(self, roles: Dict[int, dict]) -> dict:
+        """
+        The /api/snapshot member dict. ``roles`` is the guild's role table
+        (role ID -> role dict); roles missing from it are skipped.
+        """
+        member_roles = self.sorted_roles(roles)
+        return {
+            "id": str(self.id),
+            "name": self.name,
+            "discriminator": self.discriminator,
+            "global_name": self.global_name,
+            "display_name": self.display_name,
+            "nick": self.nick,
+            "avatar_url": self.avatar_url,
+            "banner_url": self.banner_url,
+            "banner_pending": self.banner_pending,
+            "accent_color": self.accent_color,
+            "badges": list(self.badges),
+            "status": STATUSES[self.status],
+            "activities": list(self.activities),
+            "joined_at": from_micros(self.joined_at),
+            "roles": member_roles,
+        }
+
+    def user_dict(self) -> dict:
+        """
+        The user-level fields, for the ``users`` table of the normalized
+        snapshot (keyed by user ID, so the ID itself is left out).
+        """
+        return {
+            "name": self.name,
+            "discriminator": self.discriminator,
+            "global_name": self.global_name,
+            "avatar_url": self.avatar_url,
+            "banner_url": self.banner_url,
+            "banner_pending": self.banner_pending,
+            "accent_color": self.accent_color,
+            "badges": list(self.badges),
+        }
+
+    def to_row(self, roles: Dict[int, dict], user_avatar_url: Optional[str]) -> dict:
+        """
+        The normalized snapshot member row: a reference into ``users``, role
+        IDs (highest first) into the guild's ``roles``, and ``avatar_url``
+        only when this member's differs from the user entry (server avatars).
+        """
+        row = {
+            "user": str(self.id),
+            "display_name": self.display_name,
+            "nick": self.nick,
+            "status": STATUSES[self.status],
+            "activities": list(self.activities),
+            "joined_at": from_micros(self.joined_at),
+            "roles": [role["id"] for role in self.sorted_roles(roles)],
+        }
+        if self.avatar_url != user_avatar_url:
+            row["avatar_url"] = self.avatar_url
+        return row
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MemberRecord":
+        """
+        Inverse of to_dict. The member's role dicts are not kept here; the
+        caller adds them to the guild's role table.
+        """
+        joined_at = data.get("joined_at")
+        return cls(
+            id=int(data["id"]),
+            name=data["name"],
+            discriminator=data["discriminator"],
+            global_name=data.get("global_name"),
+            display_name=data["display_name"],
+            nick=data.get("nick"),
+            avatar_url=data.get("avatar_url"),
+            banner_url=data.get("banner_url"),
+            banner_pending=data.get("banner_pending", False),
+            accent_color=data.get("accent_color"),
+            badges=tuple(data.get("badges", ())),
+            status=status_code(data.get("status", "offline")),
+            activities=tuple(data.get("activities", ())),
+            joined_at=to_micros(datetime.datetime.fromisoformat(joined_at)) if joined_at else None,
+            role_ids=tuple(sorted(int(role["id"]) for role in data.get("roles", ()))),
+        )
@@ -0,0 +1,161 @@
+# metrics.py
+"""
+Minimal Prometheus-style metrics, served as text at /metrics.
+
+Updates are plain dict and list operations on the event loop thread: no
+locks, no allocation once a label combination has been seen. Histograms
+keep per-bucket counts and only add them up when scraped. Metrics whose
+value already lives somewhere else (cache sizes, guild counts...) take a
+``collect`` callback that is only called on scrape.
+"""
+import bisect
+import math
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# seconds, from fast local work up to slow REST-backed commands
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# bytes, from tiny JSON errors up to full snapshots of big guilds
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+# samples kept by a RingBuffer, and the percentiles it reports by default
+RING_SIZE = 512
+PERCENTILES = (50, 95, 99)
+
+LabelValues = Tuple[str, ...]
+Collected = Union[float, Dict[LabelValues, float]]
+
+# every metric created below, in creation order
+REGISTRY: List["Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        collect: Optional[Callable[[], Collected]] = None,
+    ):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.collect = collect
+        self._values: Dict[LabelValues, float] = {}
+        REGISTRY.append(self)
+
+    def _label_text(self, values: LabelValues, extra: str = "") -> str:
+        parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.labels, values)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def samples(self) -> Dict[LabelValues, float]:
+        if self.collect is None:
+            return self._values
+        collected = self.collect()
+        return collected if isinstance(collected, dict) else {(): collected}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, value in self.samples().items():
+            if value is None:
+                continue
+            lines.append(f"{self.name}{self._label_text(values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = TIME_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket..., count above the last bucket]
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, *labels: str):
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, counts in self._counts.items():
+            total = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                total += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{self._label_text(values, le)} {total}")
+            lines.append(f"{self.name}_sum{self._label_text(values)} {_format_value(self._sums[values])}")
+            lines.append(f"{self.name}_count{self._label_text(values)} {total}")
+        return lines
+
+
+class RingBuffer:
+    """
+    The last ``size`` float samples, in a preallocated array.
+    """
+
+    __slots__ = ("_values", "_next", "count")
+
+    def __init__(self, size: int = RING_SIZE):
+        self._values = array("d", bytes(8 * size))
+        self._next = 0
+        self.count = 0  # samples ever added
+
+    def add(self, value: float):
+        self._values[self._next] = value
+        self._next = (self._next + 1) % len(self._values)
+        self.count += 1
+
+    def percentiles(self, ps: Iterable[int] = PERCENTILES) -> Dict[str, Optional[float]]:
+        """
+        Nearest-rank percentiles of the buffered samples, None while empty.
+        """
+        values = sorted(self._values[:min(self.count, len(self._values))])
+        if not values:
+            return {f"p{p}": None for p in ps}
+        return {f"p{p}": values[min(len(values) - 1, max(0, -(-p * len(values) // 100) - 1))] for p in ps}
+
+
+def render() -> str:
+    """
+    Every registered metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,338 @@
+# profiles.py
+import asyncio
+import itertools
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, NamedTuple, Optional
+
+import discord
+
+# Profile entries older than this are still served, but refetched in the background
+PROFILE_TTL = 6 * 3600
+# Entries older than this are treated as missing
+PROFILE_MAX_AGE = 7 * 86400
+# Most users kept in memory; least recently used ones are dropped first
+PROFILE_CACHE_SIZE = 50000
+
+# Resolver priorities, lower runs first
+VISIBLE = 0   # on a page someone just requested
+ONLINE = 1
+OFFLINE = 2
+REVALIDATE = 3  # stale entry that is still being served
+
+# Failed fetches (other than 404) are retried after RETRY_DELAY, doubling
+# up to RETRY_MAX_DELAY; after RETRY_ATTEMPTS the user is dropped until the
+# next lookup asks again. Nothing is cached for them meanwhile.
+RETRY_DELAY = 5.0
+RETRY_MAX_DELAY = 300.0
+RETRY_ATTEMPTS = 5
+
+
+class Profile(NamedTuple):
+    banner_url: Optional[str]
+    accent_color: Optional[int]
+    fetched_at: float
+
+
+class ProfileCache:
+    """
+    TTL + LRU cache of the profile bits that need a REST call (banner and
+    accent color), keyed by user ID.
+
+    With a ``path`` it is backed by a SQLite file so it survives restarts:
+    the file is read once on first use, and new entries are written in
+    batches by ``run_flusher`` instead of one write per fetch.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = PROFILE_TTL,
+        max_age: float = PROFILE_MAX_AGE,
+        max_size: int = PROFILE_CACHE_SIZE,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, Profile]" = OrderedDict()
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._loaded = path is None
+        self._dirty: Dict[int, Profile] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._entries)
+
+    # ---------- persistence ----------
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS profiles ("
+                "user_id INTEGER PRIMARY KEY, banner_url TEXT, accent_color INTEGER, fetched_at REAL NOT NULL)"
+            )
+        return self._conn
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with self._db_lock:
+                rows = self._db().execute(
+                    "SELECT user_id, banner_url, accent_color, fetched_at FROM profiles "
+                    "WHERE fetched_at >= ? ORDER BY fetched_at DESC LIMIT ?",
+                    (time.time() - self.max_age, self.max_size),
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Failed to load profile cache {self.path}: {e}")
+            return
+        # oldest first, so the LRU order matches fetch order
+        for user_id, banner_url, accent_color, fetched_at in reversed(rows):
+            self._entries.setdefault(user_id, Profile(banner_url, accent_color, fetched_at))
+
+    def _write(self, profiles: Dict[int, Profile]):
+        with self._db_lock:
+            conn = self._db()
+            conn.executemany(
+                "INSERT OR REPLACE INTO profiles (user_id, banner_url, accent_color, fetched_at) VALUES (?, ?, ?, ?)",
+                [(user_id, *profile) for user_id, profile in profiles.items()],
+            )
+            conn.execute("DELETE FROM profiles WHERE fetched_at < ?", (time.time() - self.max_age,))
+            conn.commit()
+
+    def flush(self):
+        """
+        Write pending entries now (blocking). Used on shutdown.
+        """
+        if self.path and self._dirty:
+            dirty, self._dirty = self._dirty, {}
+            self._write(dirty)
+
+    async def run_flusher(self, interval: float = 5.0):
+        while True:
+            await asyncio.sleep(interval)
+            if not self._dirty:
+                continue
+            dirty, self._dirty = self._dirty, {}
+            try:
+                await asyncio.to_thread(self._write, dirty)
+            except sqlite3.Error as e:
+                print(f"Failed to write profile cache {self.path}: {e}")
+
+    def start(self):
+        if self.path and self._flusher is None:
+            self._flusher = asyncio.create_task(self.run_flusher())
+
+    def close(self):
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ---------- cache ----------
+
+    def get(self, user_id: int) -> Optional[Profile]:
+        """
+        The cached profile, or None if missing or older than ``max_age``.
+        Check ``stale`` to see whether it should be revalidated.
+        """
+        self._ensure_loaded()
+        profile = self._entries.get(user_id)
+        if profile is None:
+            self.misses += 1
+            return None
+        if time.time() - profile.fetched_at > self.max_age:
+            del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return profile
+
+    def stale(self, profile: Profile) -> bool:
+        return time.time() - profile.fetched_at > self.ttl
+
+    def reserve(self, count: int):
+        """
+        Raise the size cap to at least ``count`` entries, so users still in
+        the snapshot aren't evicted (and refetched) just to make room.
+        """
+        self.max_size = max(self.max_size, count)
+
+    def put(self, user_id: int, banner_url: Optional[str], accent_color: Optional[int]) -> Profile:
+        self._ensure_loaded()
+        profile = Profile(banner_url, accent_color, time.time())
+        self._entries[user_id] = profile
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        if self.path:
+            self._dirty[user_id] = profile
+        return profile
+
+
+class RateLimiter:
+    """
+    Token bucket: at most ``rate`` acquisitions per ``per`` seconds.
+    """
+
+    def __init__(self, rate: int, per: float):
+        self.rate = rate
+        self.per = per
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.per)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) * self.per / self.rate)
+
+
+class BannerResolver:
+    """
+    Background worker pool that fills a ProfileCache via ``fetch_user``.
+
+    Nothing ever waits on it: callers ``request`` a user and carry on, and
+    ``on_resolved(user_id, profile)`` is called once the profile arrives.
+    Requests are served by priority (VISIBLE, ONLINE, OFFLINE, REVALIDATE),
+    with at most ``concurrency`` calls in flight and at most ``rate`` calls
+    per ``per`` seconds, which leaves most of the bot's REST budget to commands.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[int], Awaitable[discord.User]],
+        cache: ProfileCache,
+        on_resolved: Callable[[int, Profile], Awaitable[None]],
+        concurrency: int = 4,
+        rate: int = 10,
+        per: float = 1.0,
+    ):
+        self.fetch = fetch
+        self.cache = cache
+        self.on_resolved = on_resolved
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate, per)
+
+        self._queue: "asyncio.PriorityQueue" = asyncio.PriorityQueue()
+        self._pending: Dict[int, int] = {}  # user ID -> best queued priority
+        self._attempts: Dict[int, int] = {}  # user ID -> failed fetches so far
+        self._seq = itertools.count()
+        self._workers = []
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        if self._workers:
+            return
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    def request(self, user_id: int, priority: int = OFFLINE):
+        """
+        Queue a user for fetching, or raise the priority of a queued one.
+        """
+        queued = self._pending.get(user_id)
+        if queued is not None and queued <= priority:
+            return
+        self._pending[user_id] = priority
+        self._queue.put_nowait((priority, next(self._seq), user_id))
+
+    def prioritize(self, user_ids: Iterable[int]):
+        for user_id in user_ids:
+            if user_id in self._pending:
+                self.request(user_id, VISIBLE)
+
+    def lookup(self, user_id: int, priority: int = OFFLINE) -> Optional[Profile]:
+        """
+        Cached profile without waiting; queues a fetch on a miss and a
+        background revalidation when the cached entry is stale.
+        """
+        profile = self.cache.get(user_id)
+        if profile is None:
+            self.request(user_id, priority)
+        elif self.cache.stale(profile):
+            self.request(user_id, REVALIDATE)
+        return profile
+
+    async def resolve(self, user_id: int) -> Profile:
+        """
+        Cached profile, or fetch it right away (for commands, where someone
+        is waiting). Fetch errors propagate to the caller.
+        """
+        profile = self.lookup(user_id, VISIBLE)
+        if profile is not None:
+            return profile
+        user = await self.fetch(user_id)
+        profile = self._store(user_id, user)
+        await self.on_resolved(user_id, profile)
+        return profile
+
+    def _store(self, user_id: int, user: Optional[discord.User]) -> Profile:
+        self._pending.pop(user_id, None)
+        self._attempts.pop(user_id, None)
+        banner_url = str(user.banner.url) if user is not None and user.banner else None
+        accent_color = user.accent_color.value if user is not None and user.accent_color else None
+        return self.cache.put(user_id, banner_url, accent_color)
+
+    def _retry_later(self, user_id: int):
+        attempts = self._attempts.get(user_id, 0) + 1
+        if attempts >= RETRY_ATTEMPTS:
+            self._attempts.pop(user_id, None)
+            self._pending.pop(user_id, None)
+            return
+        self._attempts[user_id] = attempts
+        delay = min(RETRY_MAX_DELAY, RETRY_DELAY * 2 ** (attempts - 1))
+        asyncio.get_running_loop().call_later(delay, self._requeue, user_id)
+
+    def _requeue(self, user_id: int):
+        priority = self._pending.get(user_id)
+        if priority is not None:
+            self._queue.put_nowait((priority, next(self._seq), user_id))
+
+    async def _worker(self):
+        while True:
+            priority, _, user_id = await self._queue.get()
+            # stale entry: already fetched, or re-queued with a better priority
+            if self._pending.get(user_id) != priority:
+                continue
+
+            await self.limiter.acquire()
+            try:
+                user = await self.fetch(user_id)
+            except discord.NotFound:
+                # the account is gone: "no banner" is the right answer
+                user = None
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    # retry after discord.py's own backoff gave up
+                    await asyncio.sleep(getattr(e, "retry_after", 5.0))
+                    self._queue.put_nowait((priority, next(self._seq), user_id))
+                else:
+                    self._retry_later(user_id)
+                continue
+            except Exception:
+                self._retry_later(user_id)
+                continue
+
+            profile = self._store(user_id, user)
+            try:
+                await self.on_resolved(user_id, profile)
+            except Exception as e:
+                print(f"Banner resolver callback failed for {user_id}: {e}")
@@ -0,0 +1,120 @@
+# snapshot_file.py
+import asyncio
+import json
+import os
+import time
+from typing import Optional
+
+from snapshot_store import SnapshotStore
+
+# Save at least this often while the store is changing, in seconds
+PERSIST_INTERVAL = 60.0
+# ... or as soon as this many changes piled up
+PERSIST_MAX_CHANGES = 5000
+
+
+def read_snapshot(path: str) -> Optional[dict]:
+    """
+    The snapshot saved at ``path``, or None if there is none (or it is
+    unreadable). Blocking; run it in a thread from async code.
+    """
+    try:
+        with open(path, "rb") as f:
+            return json.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Failed to read snapshot {path}: {e}")
+        return None
+
+
+def write_snapshot(path: str, data: bytes):
+    """
+    Atomically replace ``path`` with ``data``: readers see either the old
+    file or the new one, never a partial write.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SnapshotPersister:
+    """
+    Keeps a SnapshotStore saved to disk so a restart can serve the last
+    known snapshot right away (``load``) instead of an empty one while the
+    gateway cache is still being chunked.
+
+    The file is the compact /api/snapshot JSON, written by ``run`` every
+    ``interval`` seconds or after ``max_changes`` changes, whichever comes
+    first, and only when something changed.
+    """
+
+    def __init__(
+        self,
+        store: SnapshotStore,
+        path: str,
+        interval: float = PERSIST_INTERVAL,
+        max_changes: int = PERSIST_MAX_CHANGES,
+    ):
+        self.store = store
+        self.path = path
+        self.interval = interval
+        self.max_changes = max_changes
+        self.saved_version: Optional[int] = None
+        self.saved_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def load(self) -> bool:
+        """
+        Fill the store from the saved file. Returns False if there is none.
+        """
+        snapshot = await asyncio.to_thread(read_snapshot, self.path)
+        if not snapshot:
+            return False
+        self.store.load(snapshot)
+        self.saved_version = self.store.version
+        return True
+
+    def _due(self) -> bool:
+        if self.saved_version == self.store.version:
+            return False
+        if self.saved_version is None:
+            return True
+        return (
+            self.store.version - self.saved_version >= self.max_changes
+            or time.monotonic() - self.saved_at >= self.interval
+        )
+
+    async def save(self):
+        version = self.store.version
+        data = self.store.encoded()
+        try:
+            await asyncio.to_thread(write_snapshot, self.path, data)
+        except OSError as e:
+            print(f"Failed to write snapshot {self.path}: {e}")
+            return
+        self.saved_version = version
+        self.saved_at = time.monotonic()
+
+    def save_now(self):
+        """
+        Blocking save, for shutdown. Does nothing unless ``start`` was
+        called, so a store that never got live data can't replace the file.
+        """
+        if self._task is not None and self.saved_version != self.store.version:
+            write_snapshot(self.path, self.store.encoded())
+            self.saved_version = self.store.version
+
+    async def run(self, poll: float = 1.0):
+        self.saved_at = time.monotonic()
+        while True:
+            await asyncio.sleep(poll)
+            if self._due():
+                await self.save()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
@@ -0,0 +1,737 @@
+# snapshot_store.py
+import asyncio
+import base64
+import datetime
+import gzip
+import json
+import os
+import secrets
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import json_backend
+import metrics
+import columnar
+from columnar import ColumnarBuilder
+from member_index import GuildIndex
+from member_record import MemberRecord
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+# How many changes the store remembers for /api/snapshot/delta.
+# Clients further behind than this get a full resync instead.
+CHANGE_LOG_SIZE = 10000
+
+# change kinds recorded in the log
+MEMBER = "member"
+GUILD = "guild"
+GUILD_SET = "guild_set"
+GUILD_REMOVE = "guild_remove"
+
+# Content-Encodings the snapshot can be served in, most preferred first.
+# Each variant is compressed at most once per snapshot version.
+COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {}
+if brotli is not None:
+    COMPRESSORS["br"] = lambda data: brotli.compress(data, quality=5)
+COMPRESSORS["gzip"] = lambda data: gzip.compress(data, compresslevel=6)
+
+# API responses rebuild a snapshot variant (format x Content-Encoding) at
+# most this often, in seconds, and serve the previous one meanwhile (see
+# SnapshotStore.variant)
+VARIANT_REFRESH = float(os.getenv("SNAPSHOT_VARIANT_REFRESH", "1"))
+
+# Time spent building each snapshot variant (only on cache misses)
+ENCODE_SECONDS = metrics.Histogram(
+    "snapshot_encode_seconds", "Time to encode or compress one snapshot variant.", ("format", "encoding")
+)
+
+# Snapshot wire formats. "full" repeats role objects and user fields in every
+# member; "normalized" moves them into per-guild ``roles`` and a global
+# ``users`` table that member rows reference by ID; "columnar" stores one
+# array per member field (see columnar.py).
+FORMATS = ("full", "normalized", "columnar")
+
+
+def utc_now() -> str:
+    return datetime.datetime.utcnow().isoformat() + "Z"
+
+
+def encode_cursor(key: Tuple) -> str:
+    """
+    Opaque pagination cursor: the sort key of the last member returned.
+    """
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple:
+    """
+    Inverse of encode_cursor. Raises ValueError for malformed cursors.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+    if not isinstance(key, list) or not all(type(part) in (str, int) for part in key):
+        raise ValueError("invalid cursor")
+    return tuple(key)
+
+
+def build_columnar(
+    header: dict,
+    guilds: List[Tuple[dict, Dict[int, dict], List[MemberRecord]]],
+    string_ids: bool = True,
+) -> dict:
+    """
+    The columnar snapshot from SnapshotStore._columnar_source's output.
+    """
+    builder = ColumnarBuilder(string_ids)
+    entries = []
+    for guild, roles, records in guilds:
+        guild = dict(guild)
+        guild["roles"] = {role["id"]: role for role in roles.values()}
+        guild["columns"] = builder.columns(records, roles)
+        entries.append(guild)
+
+    snapshot = dict(header)
+    snapshot["format"] = "columnar"
+    snapshot.update(builder.tables())
+    snapshot["guilds"] = entries
+    return snapshot
+
+
+def encode_columnar(source: tuple, binary: bool) -> bytes:
+    """
+    Build and encode the columnar snapshot (JSON with string IDs, or
+    MessagePack with int IDs); meant to run in a worker thread.
+    """
+    return columnar.encode(build_columnar(*source, string_ids=not binary), binary)
+
+
+class SnapshotStore:
+    """
+    Live in-memory model of the snapshot served by the API.
+
+    Gateway events patch single member records instead of rebuilding
+    everything. Members are kept as compact MemberRecords plus one role
+    table per guild; wire dicts are only built when a response needs them,
+    and encoded member JSON is reused until that member changes.
+
+    Every change bumps ``version`` and is recorded in a bounded change log,
+    so clients can ask for what changed since the version they hold.
+    ``epoch`` changes on every restart, which invalidates old versions.
+    """
+
+    def __init__(self, log_size: int = CHANGE_LOG_SIZE):
+        self.guilds: Dict[int, dict] = {}
+        self.members: Dict[int, Dict[int, MemberRecord]] = {}
+        # per guild: role ID -> role dict ({id, name, color, position})
+        self.roles: Dict[int, Dict[int, dict]] = {}
+        self.generated_at = utc_now()
+
+        self.epoch = secrets.token_hex(4)
+        self.version = 0
+        # (version, kind, guild_id, member_id)
+        self._log: Deque[Tuple[int, str, int, Optional[int]]] = deque(maxlen=log_size)
+        # oldest version a delta can still be computed from
+        self._log_floor = 0
+
+        # per guild: sorted member orders and lookup sets for queries
+        self._index: Dict[int, GuildIndex] = {}
+
+        # per guild: member ID -> encoded member JSON, until that member
+        # changes; a guild's JSON is spliced together from these
+        self._member_bytes: Dict[int, Dict[int, bytes]] = {}
+        # the same for the normalized format: member ID -> ['"<ID>":<users
+        # entry JSON>', that entry's avatar_url, avatar_url the row was
+        # built against, row JSON]
+        self._member_rows: Dict[int, Dict[int, list]] = {}
+        # (format, Content-Encoding) -> bytes, for the current version only
+        self._encoded: Dict[Tuple[str, str], bytes] = {}
+        # (format, Content-Encoding) -> (version, monotonic time built, bytes)
+        # of the last variant built for responses, kept across versions
+        self._variants: Dict[Tuple[str, str], Tuple[int, float, bytes]] = {}
+        self._rebuilds: Dict[Tuple[str, str], asyncio.Task] = {}
+
+        # set (and swapped for a fresh one) on every change, see wait_for_change
+        self._changed = asyncio.Event()
+
+    # ---------- writes ----------
+
+    def _touch(self, kind: Optional[str] = None, guild_id: Optional[int] = None, member_ids: Iterable[int] = ()):
+        self.version += 1
+        self.generated_at = utc_now()
+        self._encoded = {}
+        for caches in (self._member_bytes, self._member_rows):
+            if kind in (GUILD_SET, GUILD_REMOVE):
+                caches.pop(guild_id, None)
+            elif guild_id in caches:
+                cache = caches[guild_id]
+                for member_id in member_ids:
+                    cache.pop(member_id, None)
+
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+        if kind is None:
+            # not expressible as a delta: everyone resyncs
+            self._log.clear()
+            self._log_floor = self.version
+            return
+        for member_id in member_ids or (None,):
+            if len(self._log) == self._log.maxlen:
+                self._log_floor = self._log[0][0]
+            self._log.append((self.version, kind, guild_id, member_id))
+
+    def load(self, snapshot: dict):
+        """
+        Replace the whole store with a full snapshot in the wire format.
+        """
+        self.guilds.clear()
+        self.members.clear()
+        self.roles.clear()
+        self._index.clear()
+        self._member_bytes.clear()
+        self._member_rows.clear()
+        for guild in snapshot.get("guilds", []):
+            guild = dict(guild)
+            member_dicts = guild.pop("members", [])
+            guild.pop("roles", None)
+            roles = {}
+            for member in member_dicts:
+                for role in member.get("roles", ()):
+                    roles.setdefault(role["id"], role)
+            self.set_guild(guild, [MemberRecord.from_dict(m) for m in member_dicts], roles.values())
+        self._touch()
+
+    def set_guild(
+        self,
+        guild: dict,
+        members: Iterable[MemberRecord],
+        roles: Iterable[dict],
+        index: Optional[GuildIndex] = None,
+    ):
+        """
+        Insert or replace a guild together with all of its members and roles.
+
+        ``index`` is a GuildIndex of exactly these members and roles built
+        beforehand (see GuildIndex.build); otherwise one is built here.
+        """
+        guild_id = int(guild["id"])
+        self.guilds[guild_id] = guild
+        self.members[guild_id] = {member.id: member for member in members}
+        self.roles[guild_id] = {int(role["id"]): role for role in roles}
+        if index is None:
+            index = GuildIndex(self.members[guild_id], self.roles[guild_id])
+        self._index[guild_id] = index
+        self._touch(GUILD_SET, guild_id)
+
+    def update_guild(self, guild: dict):
+        """
+        Update guild header fields (name, icon, member count) only.
+        """
+        guild_id = int(guild["id"])
+        if guild_id not in self.guilds:
+            return
+        self.guilds[guild_id] = guild
+        self._touch(GUILD, guild_id)
+
+    def remove_guild(self, guild_id: int):
+        if self.guilds.pop(guild_id, None) is None:
+            return
+        self.members.pop(guild_id, None)
+        self.roles.pop(guild_id, None)
+        self._index.pop(guild_id, None)
+        self._touch(GUILD_REMOVE, guild_id)
+
+    def upsert_member(self, guild_id: int, member: MemberRecord) -> bool:
+        """
+        Insert or replace one member record. Returns False if the record
+        is unchanged or the guild is not loaded yet.
+        """
+        members = self.members.get(guild_id)
+        if members is None:
+            return False
+
+        if members.get(member.id) == member:
+            return False
+        members[member.id] = member
+        self._index[guild_id].upsert(member.id, member, self.roles[guild_id])
+
+        self._touch(MEMBER, guild_id, (member.id,))
+        return True
+
+    def patch_user(self, user_id: int, **fields) -> int:
+        """
+        Update user-level fields (e.g. banner) of this user's member record
+        in every guild. Returns how many records changed.
+        """
+        changed = 0
+        for guild_id, members in self.members.items():
+            member = members.get(user_id)
+            if member is not None and self.upsert_member(guild_id, member.replace(**fields)):
+                changed += 1
+        return changed
+
+    def find_user(self, user_id: int) -> Optional[MemberRecord]:
+        """
+        This user's member record from any guild, or None.
+        """
+        for members in self.members.values():
+            member = members.get(user_id)
+            if member is not None:
+                return member
+        return None
+
+    def remove_member(self, guild_id: int, member_id: int) -> bool:
+        members = self.members.get(guild_id)
+        if members is None or members.pop(member_id, None) is None:
+            return False
+        self._index[guild_id].remove(member_id)
+
+        self._touch(MEMBER, guild_id, (member_id,))
+        return True
+
+    def set_role(self, guild_id: int, role: dict):
+        """
+        Insert or update a role. Its holders are re-indexed when the
+        position moved and show up as changed members in deltas.
+        """
+        roles = self.roles.get(guild_id)
+        if roles is None:
+            return
+        role_id = int(role["id"])
+        old = roles.get(role_id)
+        if old == role:
+            return
+        roles[role_id] = role
+
+        index = self._index[guild_id]
+        holders = list(index.by_role.get(role_id, ()))
+        if old is not None and old["position"] != role["position"]:
+            members = self.members[guild_id]
+            for member_id in holders:
+                index.upsert(member_id, members[member_id], roles)
+        self._touch(MEMBER if holders else GUILD, guild_id, holders)
+
+    def remove_role(self, guild_id: int, role_id: int):
+        roles = self.roles.get(guild_id)
+        if roles is None or roles.pop(role_id, None) is None:
+            return
+
+        index = self._index[guild_id]
+        members = self.members[guild_id]
+        holders = list(index.by_role.get(role_id, ()))
+        for member_id in holders:
+            member = members[member_id].replace(
+                role_ids=tuple(r for r in members[member_id].role_ids if r != role_id)
+            )
+            members[member_id] = member
+            index.upsert(member_id, member, roles)
+        self._touch(MEMBER if holders else GUILD, guild_id, holders)
+
+    # ---------- reads ----------
+
+    async def wait_for_change(self, version: int, timeout: float) -> bool:
+        """
+        Wait until the store moves past ``version``. Returns False if
+        nothing changed within ``timeout`` seconds.
+        """
+        if self.version != version:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def member_dicts(self, guild_id: int, member_ids: Iterable[int]) -> List[dict]:
+        members = self.members[guild_id]
+        roles = self.roles[guild_id]
+        return [members[member_id].to_dict(roles) for member_id in member_ids]
+
+    def guild_snapshot(self, guild_id: int) -> dict:
+        """
+        One guild in the snapshot format, members in display-name order.
+        """
+        guild = dict(self.guilds[guild_id])
+        guild["members"] = self.member_dicts(guild_id, self._index[guild_id].member_ids())
+        return guild
+
+    def _sorted_guild_ids(self) -> List[int]:
+        return sorted(self.guilds, key=lambda guild_id: self.guilds[guild_id]["name"].lower())
+
+    def _header(self) -> dict:
+        return {
+            "epoch": self.epoch,
+            "version": self.version,
+            "generated_at": self.generated_at,
+        }
+
+    def snapshot(self) -> dict:
+        """
+        Build the full snapshot dict. Prefer ``encoded`` for responses,
+        which reuses the JSON of members that did not change.
+        """
+        snapshot = self._header()
+        snapshot["guilds"] = [self.guild_snapshot(guild_id) for guild_id in self._sorted_guild_ids()]
+        return snapshot
+
+    def normalized_snapshot(self) -> dict:
+        """
+        The snapshot in the "normalized" format: each guild has a ``roles``
+        table (role ID -> role) and member rows (see MemberRecord.to_row);
+        user-level fields live once in the top-level ``users`` table.
+        """
+        users: Dict[str, dict] = {}
+        guilds = []
+        for guild_id in self._sorted_guild_ids():
+            members = self.members[guild_id]
+            roles = self.roles[guild_id]
+            rows = []
+            for member_id in self._index[guild_id].member_ids():
+                member = members[member_id]
+                user = users.get(str(member_id))
+                if user is None:
+                    user = users[str(member_id)] = member.user_dict()
+                rows.append(member.to_row(roles, user["avatar_url"]))
+            guild = dict(self.guilds[guild_id])
+            guild["roles"] = {role["id"]: role for role in roles.values()}
+            guild["members"] = rows
+            guilds.append(guild)
+
+        snapshot = self._header()
+        snapshot["format"] = "normalized"
+        snapshot["users"] = users
+        snapshot["guilds"] = guilds
+        return snapshot
+
+    def _columnar_source(self) -> Tuple[dict, List[Tuple[dict, Dict[int, dict], List[MemberRecord]]]]:
+        """
+        What columnar_snapshot reads: the header and, per guild, its header,
+        role table and member records in order. Records, role dicts and
+        guild headers are replaced on change, never modified, so copying
+        the containers is enough for the columns to be built from this in
+        another thread while the store keeps changing.
+        """
+        guilds = []
+        for guild_id in self._sorted_guild_ids():
+            members = self.members[guild_id]
+            records = [members[member_id] for member_id in self._index[guild_id].member_ids()]
+            guilds.append((self.guilds[guild_id], dict(self.roles[guild_id]), records))
+        return self._header(), guilds
+
+    def columnar_snapshot(self, string_ids: bool = True) -> dict:
+        """
+        The snapshot in the "columnar" format (see columnar.py), with member
+        and role IDs as strings (for JSON) or as ints (for MessagePack).
+        """
+        return build_columnar(*self._columnar_source(), string_ids)
+
+    def ndjson_lines(self) -> Iterator[bytes]:
+        """
+        The snapshot as NDJSON lines: a "snapshot" header, then per guild a
+        "guild" line followed by one "member" line per member.
+
+        Meant to be consumed lazily while the store keeps changing: only
+        the member ID order of the current guild is copied, members that
+        leave before their turn are skipped, and the rest are serialized
+        one at a time.
+        """
+        yield json_backend.dumps(dict(self._header(), type="snapshot")) + b"\n"
+        for guild_id in self._sorted_guild_ids():
+            guild = self.guilds.get(guild_id)
+            if guild is None:
+                continue
+            yield json_backend.dumps(dict(guild, type="guild")) + b"\n"
+
+            member_ids = list(self._index[guild_id].member_ids())
+            guild_str = guild["id"]
+            for member_id in member_ids:
+                members = self.members.get(guild_id)
+                if members is None:
+                    break
+                member = members.get(member_id)
+                if member is not None:
+                    row = member.to_dict(self.roles[guild_id])
+                    row["type"] = "member"
+                    row["guild_id"] = guild_str
+                    yield json_backend.dumps(row) + b"\n"
+
+    def guild_list(self) -> List[dict]:
+        """
+        Guild headers (no members), sorted like the snapshot.
+        """
+        return [
+            dict(self.guilds[guild_id], loaded_members=len(self.members[guild_id]))
+            for guild_id in self._sorted_guild_ids()
+        ]
+
+    def query_members(
+        self,
+        guild_id: int,
+        q: str = "",
+        statuses: Iterable[str] = (),
+        role_id: Optional[int] = None,
+        sort: str = "name",
+        after: Optional[Tuple] = None,
+        limit: int = 100,
+    ) -> Tuple[List[dict], Optional[Tuple]]:
+        """
+        One page of a guild's members matching the filters, in ``sort`` order
+        (see GuildIndex.query), starting after the sort key ``after``.
+        Returns the page and the key to continue from (None on the last page).
+        Raises KeyError for unknown guilds.
+        """
+        member_ids, next_key = self._index[guild_id].query(q, statuses, role_id, sort, after, limit)
+        return self.member_dicts(guild_id, member_ids), next_key
+
+    def etag(self, encoding: str = "identity", fmt: str = "full", version: Optional[int] = None) -> str:
+        """
+        Strong ETag of the snapshot at ``version`` (default: the current
+        one) in the given encoding and format; unique per epoch, version,
+        format and Content-Encoding.
+        """
+        tag = f"{self.epoch}-{self.version if version is None else version}"
+        if fmt != "full":
+            tag += f"-{fmt}"
+        if encoding != "identity":
+            tag += f"-{encoding}"
+        return f'"{tag}"'
+
+    def _guild_parts(self, guild_id: int, parts: List[bytes]):
+        """
+        Append guild_snapshot(guild_id) as JSON to ``parts``, in pieces to
+        be joined with b"". Only members that changed since the last call
+        are re-encoded.
+        """
+        member_bytes = self._member_bytes.setdefault(guild_id, {})
+        members = self.members[guild_id]
+        roles = self.roles[guild_id]
+        parts.append(json_backend.dumps(self.guilds[guild_id])[:-1] + b',"members":[')
+        separator = b""
+        for member_id in self._index[guild_id].member_ids():
+            row = member_bytes.get(member_id)
+            if row is None:
+                row = member_bytes[member_id] = json_backend.dumps(members[member_id].to_dict(roles))
+            parts.append(separator)
+            parts.append(row)
+            separator = b","
+        parts.append(b"]}")
+
+    def _normalized_encoded(self) -> bytes:
+        """
+        normalized_snapshot() as JSON, spliced together from per-member
+        pieces like the full format: only members that changed since the
+        last call are re-encoded.
+        """
+        dumps = json_backend.dumps
+        users: List[bytes] = []
+        # user ID -> avatar_url of its users entry (from its first guild)
+        user_avatars: Dict[int, Optional[str]] = {}
+        user_separator = b""
+        guilds: List[bytes] = []
+        for guild_id in self._sorted_guild_ids():
+            cache = self._member_rows.setdefault(guild_id, {})
+            members = self.members[guild_id]
+            roles = self.roles[guild_id]
+            guild = dict(self.guilds[guild_id])
+            guild["roles"] = {role["id"]: role for role in roles.values()}
+            guilds.append((b"," if guilds else b"") + dumps(guild)[:-1] + b',"members":[')
+            separator = b""
+            for member_id in self._index[guild_id].member_ids():
+                entry = cache.get(member_id)
+                if entry is None:
+                    member = members[member_id]
+                    user = b'"%d":%s' % (member_id, dumps(member.user_dict()))
+                    entry = cache[member_id] = [user, member.avatar_url, None, None]
+                if member_id not in user_avatars:
+                    user_avatars[member_id] = entry[1]
+                    users.append(user_separator)
+                    users.append(entry[0])
+                    user_separator = b","
+                user_avatar = user_avatars[member_id]
+                if entry[3] is None or entry[2] != user_avatar:
+                    entry[2] = user_avatar
+                    entry[3] = dumps(members[member_id].to_row(roles, user_avatar))
+                guilds.append(separator)
+                guilds.append(entry[3])
+                separator = b","
+            guilds.append(b"]}")
+
+        header = dumps(self._header())[:-1] + b',"format":"normalized","users":{'
+        return b"".join([header, *users, b'},"guilds":[', *guilds, b"]}"])
+
+    def encoded(self, encoding: str = "identity", fmt: str = "full") -> bytes:
+        """
+        The current snapshot in one of FORMATS as JSON bytes, optionally
+        compressed with one of COMPRESSORS. Each variant is built once per
+        version, on the calling thread (API responses use ``variant``); in
+        the full format only members that changed are re-encoded.
+        """
+        body = self._encoded.get((fmt, encoding))
+        if body is None:
+            raw = self.encoded(fmt=fmt) if encoding != "identity" else None
+            start = time.perf_counter()
+            if raw is not None:
+                body = COMPRESSORS[encoding](raw)
+            elif fmt == "normalized":
+                body = self._normalized_encoded()
+            elif fmt == "columnar":
+                body = columnar.encode(self.columnar_snapshot())
+            else:
+                # one join, so the body is copied once however big it is
+                parts = [json_backend.dumps(self._header())[:-1] + b',"guilds":[']
+                for i, guild_id in enumerate(self._sorted_guild_ids()):
+                    if i:
+                        parts.append(b",")
+                    self._guild_parts(guild_id, parts)
+                parts.append(b"]}")
+                body = b"".join(parts)
+            ENCODE_SECONDS.observe(time.perf_counter() - start, fmt, encoding)
+            self._encoded[(fmt, encoding)] = body
+        return body
+
+    def msgpack(self, encoding: str = "identity") -> bytes:
+        """
+        The columnar snapshot as MessagePack, optionally compressed; built
+        once per version like ``encoded``. Requires msgpack or msgspec
+        (``columnar.packb`` is None without them).
+        """
+        body = self._encoded.get(("msgpack", encoding))
+        if body is None:
+            raw = self.msgpack() if encoding != "identity" else None
+            start = time.perf_counter()
+            if raw is not None:
+                body = COMPRESSORS[encoding](raw)
+            else:
+                body = columnar.encode(self.columnar_snapshot(string_ids=False), binary=True)
+            ENCODE_SECONDS.observe(time.perf_counter() - start, "msgpack", encoding)
+            self._encoded[("msgpack", encoding)] = body
+        return body
+
+    async def _raw(self, fmt: str) -> bytes:
+        """
+        The uncompressed body of ``fmt`` at the current version. The full
+        and normalized formats are spliced from cached member pieces; the
+        columnar ones are rebuilt whole, so that happens in a worker thread
+        (from a copy, see _columnar_source).
+        """
+        if fmt not in ("columnar", "msgpack"):
+            return self.encoded(fmt=fmt)
+        body = self._encoded.get((fmt, "identity"))
+        if body is None:
+            version = self.version
+            source = self._columnar_source()
+            start = time.perf_counter()
+            body = await asyncio.to_thread(encode_columnar, source, fmt == "msgpack")
+            ENCODE_SECONDS.observe(time.perf_counter() - start, fmt, "identity")
+            if self.version == version:
+                self._encoded[(fmt, "identity")] = body
+        return body
+
+    async def _rebuild(self, fmt: str, encoding: str) -> Tuple[int, bytes]:
+        try:
+            version = self.version
+            body = self._encoded.get((fmt, encoding))
+            if body is None:
+                body = await self._raw(fmt)
+                if encoding != "identity":
+                    # the input is immutable bytes and zlib / brotli release
+                    # the GIL, so compressing in a thread leaves the loop free
+                    start = time.perf_counter()
+                    body = await asyncio.to_thread(COMPRESSORS[encoding], body)
+                    ENCODE_SECONDS.observe(time.perf_counter() - start, fmt, encoding)
+                    if self.version == version:
+                        self._encoded[(fmt, encoding)] = body
+            self._variants[(fmt, encoding)] = (version, time.monotonic(), body)
+            return version, body
+        finally:
+            del self._rebuilds[(fmt, encoding)]
+
+    @staticmethod
+    def _rebuild_done(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Failed to build a snapshot variant: {task.exception()!r}")
+
+    async def variant(self, fmt: str = "full", encoding: str = "identity") -> Tuple[int, bytes]:
+        """
+        ``(version, body)`` of the snapshot in one of FORMATS (or "msgpack")
+        and one of COMPRESSORS, for API responses; use ``etag(encoding,
+        fmt, version)`` for its ETag.
+
+        Changes bump the version all the time, so rather than rebuilding on
+        every request this serves the last body built while a rebuild runs
+        in the background, and rebuilds a variant at most once per
+        VARIANT_REFRESH seconds. Only the very first request for a variant
+        waits for it.
+        """
+        key = (fmt, encoding)
+        built = self._variants.get(key)
+        if built is not None and built[0] == self.version:
+            return built[0], built[2]
+        task = self._rebuilds.get(key)
+        if task is None and (built is None or time.monotonic() - built[1] >= VARIANT_REFRESH):
+            task = self._rebuilds[key] = asyncio.create_task(self._rebuild(fmt, encoding))
+            task.add_done_callback(self._rebuild_done)
+        if built is not None:
+            return built[0], built[2]
+        # shielded: a client going away mustn't cancel everyone's build
+        return await asyncio.shield(task)
+
+    def delta(self, since: int, epoch: Optional[str] = None) -> Optional[dict]:
+        """
+        Return everything that changed after version ``since``, or None when
+        the change log no longer reaches back that far (or the epoch differs)
+        and the client has to resync from the full snapshot.
+
+        Each touched guild is listed with its current header plus the members
+        that were added/changed (``upserted``) or left (``removed``). A guild
+        that was reloaded as a whole carries its full ``members`` list instead.
+        """
+        if (epoch is not None and epoch != self.epoch) or since < self._log_floor or since > self.version:
+            return None
+
+        touched: Dict[int, Dict[int, None]] = {}
+        replaced = set()
+        removed_guilds = set()
+        for version, kind, guild_id, member_id in reversed(self._log):
+            if version <= since:
+                break
+            if kind == GUILD_REMOVE:
+                removed_guilds.add(guild_id)
+            elif kind == GUILD_SET:
+                replaced.add(guild_id)
+            touched.setdefault(guild_id, {})
+            if member_id is not None:
+                touched[guild_id][member_id] = None
+
+        guilds = []
+        for guild_id, member_ids in touched.items():
+            if guild_id not in self.guilds:
+                removed_guilds.add(guild_id)
+                continue
+            removed_guilds.discard(guild_id)
+            if guild_id in replaced:
+                entry = self.guild_snapshot(guild_id)
+                entry["replaced"] = True
+            else:
+                members = self.members[guild_id]
+                entry = dict(self.guilds[guild_id])
+                entry["upserted"] = self.member_dicts(guild_id, (mid for mid in member_ids if mid in members))
+                entry["removed"] = [str(mid) for mid in member_ids if mid not in members]
+            guilds.append(entry)
+
+        return {
+            "epoch": self.epoch,
+            "version": self.version,
+            "since": since,
+            "generated_at": self.generated_at,
+            "full": False,
+            "guilds": guilds,
+            "removed_guilds": [str(guild_id) for guild_id in removed_guilds],
+        }
@@ -0,0 +1,120 @@
+# tests/test_columnar.py
+import json
+import os
+
+import pytest
+
+import columnar
+import json_backend
+from benchmarks.synthetic import make_snapshot
+from snapshot_store import SnapshotStore
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "members_snapshot.json")
+
+
+def edge_cases() -> dict:
+    """
+    A small snapshot with the awkward bits: nulls, a member without roles,
+    an unknown activity type, an activity shared by two members, an empty
+    guild.
+    """
+    snapshot = make_snapshot(50, guilds=2, seed=1)
+    members = snapshot["guilds"][0]["members"]
+    members[0].update(global_name=None, nick=None, avatar_url=None, joined_at=None, badges=[], roles=[])
+    members[1]["activities"] = [{"type": "something-new", "name": "x"}]
+    members[2]["activities"] = members[3]["activities"] = [{"type": "playing", "name": "Same Game"}]
+    snapshot["guilds"].append({"id": "1", "name": "empty", "icon_url": None, "member_count": 0, "members": []})
+    return snapshot
+
+
+def sample() -> dict:
+    if not os.path.exists(SAMPLE):
+        pytest.skip("members_snapshot.json not present")
+    with open(SAMPLE) as f:
+        return json.load(f)
+
+
+SNAPSHOTS = {
+    "edge cases": edge_cases,
+    "synthetic": lambda: make_snapshot(2000, guilds=3),
+    "members_snapshot.json": sample,
+}
+
+
+@pytest.fixture(params=list(SNAPSHOTS))
+def store(request) -> SnapshotStore:
+    store = SnapshotStore()
+    store.load(SNAPSHOTS[request.param]())
+    return store
+
+
+def full(store: SnapshotStore) -> dict:
+    return json.loads(store.encoded())
+
+
+def test_json_round_trip(store):
+    data = json.loads(store.encoded(fmt="columnar"))
+    assert data["format"] == "columnar"
+    assert columnar.from_columnar(data) == full(store)
+
+
+def test_msgpack_round_trip(store):
+    msgpack = pytest.importorskip("msgpack")
+    if columnar.packb is None:
+        pytest.skip("no MessagePack encoder")
+    assert columnar.from_columnar(msgpack.unpackb(store.msgpack())) == full(store)
+
+
+def test_from_columnar_accepts_int_ids(store):
+    assert columnar.from_columnar(store.columnar_snapshot(string_ids=False)) == full(store)
+
+
+def test_encode_matches_a_single_call(store):
+    data = store.columnar_snapshot()
+    assert columnar.encode(data) == json_backend.dumps(data)
+    if columnar.packb is not None:
+        data = store.columnar_snapshot(string_ids=False)
+        assert columnar.encode(data, binary=True) == columnar.packb(data)
+
+
+def test_json_ids_are_strings():
+    store = SnapshotStore()
+    store.load(edge_cases())
+    data = json.loads(store.encoded(fmt="columnar"))
+    for guild in data["guilds"]:
+        columns = guild["columns"]
+        assert all(isinstance(member_id, str) for member_id in columns["id"])
+        assert all(isinstance(role_id, str) for roles in columns["roles"] for role_id in roles)
+        assert all(role_id in guild["roles"] for roles in columns["roles"] for role_id in roles)
+
+
+def test_msgpack_ids_are_ints():
+    msgpack = pytest.importorskip("msgpack")
+    store = SnapshotStore()
+    store.load(edge_cases())
+    data = msgpack.unpackb(store.msgpack())
+    for guild in data["guilds"]:
+        columns = guild["columns"]
+        assert all(isinstance(member_id, int) for member_id in columns["id"])
+        assert all(isinstance(role_id, int) for roles in columns["roles"] for role_id in roles)
+
+
+def test_edge_cases_encoding():
+    store = SnapshotStore()
+    store.load(edge_cases())
+    data = store.columnar_snapshot()
+    guilds = {guild["name"]: guild for guild in data["guilds"]}
+
+    empty = guilds["empty"]["columns"]
+    assert all(column == [] for column in empty.values())
+
+    columns = guilds["guild 0"]["columns"]
+    bare = columns["id"].index(str(edge_cases()["guilds"][0]["members"][0]["id"]))
+    assert columns["nick"][bare] is None
+    assert columns["joined_at"][bare] is None
+    assert columns["badges"][bare] == []
+    assert columns["roles"][bare] == []
+
+    # unknown activity types are kept as their name; shared activities are stored once
+    assert {"type": "something-new", "name": "x"} in data["activities"]
+    assert sum(1 for activity in data["activities"] if activity.get("name") == "Same Game") == 1
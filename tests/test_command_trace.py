@@ -0,0 +1,80 @@
+# tests/test_command_trace.py
+import asyncio
+import json
+
+import discord
+from discord.ext import commands
+
+from command_trace import CommandTracer
+
+# how long each fake REST call takes
+LATENCY = 0.02
+
+USER = {"id": "5", "username": "someone", "discriminator": "0", "avatar": None}
+MESSAGE = {
+    "id": "6", "channel_id": "4", "author": USER, "content": "pong", "timestamp": "2026-01-01T00:00:00+00:00",
+    "edited_timestamp": None, "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [],
+    "attachments": [], "embeds": [], "pinned": False, "type": 0,
+}
+
+
+class FakeResponse:
+    status = 200
+    headers = {"content-type": "application/json"}
+
+    def __init__(self, body: dict):
+        self.body = body
+
+    async def text(self, encoding=None) -> str:
+        return json.dumps(self.body)
+
+    async def __aenter__(self):
+        await asyncio.sleep(LATENCY)
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+class FakeSession:
+    """
+    Stands in for the interaction's aiohttp session: the callback POST,
+    then the GET of the original response that ctx.send does.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def request(self, method: str, url: str, **kwargs) -> FakeResponse:
+        self.calls += 1
+        return FakeResponse(MESSAGE if method == "GET" else {"interaction": {"id": "1", "type": 2}})
+
+
+def test_slash_ctx_send_counts_as_discord_time():
+    async def run():
+        bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+        tracer = CommandTracer(bot)
+        tracer.install()
+
+        @bot.hybrid_command()
+        async def ping(ctx):
+            await ctx.send("pong")
+
+        interaction = discord.Interaction(data={
+            "id": str(discord.utils.time_snowflake(discord.utils.utcnow())),
+            "application_id": "2", "type": 2, "token": "token", "version": 1,
+            "attachment_size_limit": 8 * 1024 * 1024,
+            "data": {"id": "3", "name": "ping", "type": 1},
+            "channel_id": "4", "channel": {"id": "4", "type": 1}, "user": USER,
+        }, state=bot._connection)
+        interaction._session = session = FakeSession()
+        ctx = await commands.Context.from_interaction(interaction)
+
+        tracer.start()
+        await ctx.send("pong")
+        tracer.finish("ping")
+        return session.calls, tracer.report()["ping"]
+
+    calls, report = asyncio.run(run())
+    assert calls == 2
+    assert report["discord_ms"]["p50"] >= calls * LATENCY * 1000
@@ -0,0 +1,74 @@
+# tests/test_profiles.py
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+import profiles
+from profiles import BannerResolver, ProfileCache
+
+
+def response(status: int):
+    return SimpleNamespace(status=status, reason="", headers={})
+
+
+def fake_user():
+    return SimpleNamespace(banner=SimpleNamespace(url="https://example.com/banner.png"), accent_color=None)
+
+
+def resolve_all(fetch, user_ids, monkeypatch):
+    monkeypatch.setattr(profiles, "RETRY_DELAY", 0.0)
+    cache = ProfileCache()
+    resolved = {}
+
+    async def on_resolved(user_id, profile):
+        resolved[user_id] = profile
+
+    async def run():
+        resolver = BannerResolver(fetch, cache, on_resolved, rate=1000)
+        resolver.start()
+        for user_id in user_ids:
+            resolver.request(user_id)
+        for _ in range(100):
+            if not resolver.pending:
+                break
+            await asyncio.sleep(0.01)
+        return resolver
+
+    return asyncio.run(run()), cache, resolved
+
+
+def test_errors_are_retried_not_cached(monkeypatch):
+    calls = []
+
+    async def fetch(user_id):
+        calls.append(user_id)
+        if len(calls) == 1:
+            raise discord.HTTPException(response(500), "oops")
+        return fake_user()
+
+    _, cache, resolved = resolve_all(fetch, [1], monkeypatch)
+    assert calls == [1, 1]
+    assert resolved[1].banner_url == cache.get(1).banner_url == "https://example.com/banner.png"
+
+
+def test_deleted_users_are_cached_without_banner(monkeypatch):
+    async def fetch(user_id):
+        raise discord.NotFound(response(404), "Unknown User")
+
+    _, cache, resolved = resolve_all(fetch, [1], monkeypatch)
+    assert cache.get(1).banner_url is None
+    assert resolved[1].banner_url is None
+
+
+def test_failing_users_are_dropped_after_some_attempts(monkeypatch):
+    calls = []
+
+    async def fetch(user_id):
+        calls.append(user_id)
+        raise ConnectionError
+
+    resolver, cache, resolved = resolve_all(fetch, [1], monkeypatch)
+    assert len(calls) == profiles.RETRY_ATTEMPTS
+    assert not resolver.pending and not resolved
+    assert cache.get(1) is None
@@ -0,0 +1,101 @@
+# tests/test_snapshot_store.py
+import asyncio
+import gzip
+import json
+
+import columnar
+import json_backend
+import snapshot_store
+from benchmarks.synthetic import make_snapshot
+from snapshot_store import SnapshotStore
+
+
+def loaded(members: int = 200, guilds: int = 2) -> SnapshotStore:
+    store = SnapshotStore()
+    store.load(make_snapshot(members, guilds=guilds))
+    return store
+
+
+def change_someone(store: SnapshotStore):
+    guild_id, members = next(iter(store.members.items()))
+    member = next(iter(members.values()))
+    store.upsert_member(guild_id, member.replace(status=(member.status + 1) % 4))
+
+
+def test_variant_is_the_current_snapshot():
+    store = loaded()
+
+    async def run():
+        return await store.variant("full", "gzip")
+
+    version, body = asyncio.run(run())
+    assert version == store.version
+    assert json.loads(gzip.decompress(body)) == json.loads(store.encoded())
+    assert store.etag("gzip", "full", version) == store.etag("gzip", "full")
+
+
+def test_variant_serves_previous_body_until_rebuilt(monkeypatch):
+    store = loaded()
+
+    async def run():
+        first = await store.variant("full", "gzip")
+        change_someone(store)
+
+        # rebuilt at most once per VARIANT_REFRESH: the old body meanwhile
+        monkeypatch.setattr(snapshot_store, "VARIANT_REFRESH", 3600.0)
+        assert await store.variant("full", "gzip") == first
+        assert not store._rebuilds
+
+        # due: still the old body, with the rebuild running in the background
+        monkeypatch.setattr(snapshot_store, "VARIANT_REFRESH", 0.0)
+        assert await store.variant("full", "gzip") == first
+        await store._rebuilds[("full", "gzip")]
+        return first, await store.variant("full", "gzip")
+
+    (old_version, _), (version, body) = asyncio.run(run())
+    assert version == store.version > old_version
+    assert json.loads(gzip.decompress(body)) == json.loads(store.encoded())
+
+
+def test_spliced_formats_match_a_fresh_encode():
+    snapshot = make_snapshot(300, guilds=3)
+    # one user in two guilds, with a server avatar in the second
+    twin = dict(snapshot["guilds"][0]["members"][0], avatar_url="https://example.com/server-avatar.png")
+    snapshot["guilds"][1]["members"].append(twin)
+    store = SnapshotStore()
+    store.load(snapshot)
+
+    def check():
+        assert store.encoded() == json_backend.dumps(store.snapshot())
+        assert store.encoded(fmt="normalized") == json_backend.dumps(store.normalized_snapshot())
+
+    check()
+    guild_id = next(iter(store.members))
+    twin_id = int(twin["id"])
+    store.upsert_member(guild_id, store.members[guild_id][twin_id].replace(avatar_url="https://example.com/new.png"))
+    check()
+    store.remove_member(guild_id, twin_id)
+    check()
+    role = dict(next(iter(store.roles[guild_id].values())), name="renamed", position=99)
+    store.set_role(guild_id, role)
+    check()
+    store.remove_role(guild_id, int(role["id"]))
+    check()
+    store.update_guild(dict(store.guilds[guild_id], name="zzz"))
+    check()
+    store.remove_guild(guild_id)
+    check()
+
+
+def test_columnar_variants_are_built_like_the_sync_ones():
+    store = loaded()
+
+    formats = ["columnar"] + (["msgpack"] if columnar.packb is not None else [])
+
+    async def run():
+        return [await store.variant(fmt) for fmt in formats]
+
+    variants = dict(zip(formats, asyncio.run(run())))
+    assert variants["columnar"] == (store.version, store.encoded(fmt="columnar"))
+    if "msgpack" in variants:
+        assert variants["msgpack"] == (store.version, store.msgpack())